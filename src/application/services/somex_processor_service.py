@@ -1,7 +1,12 @@
 """Somex Processor Service - Application Layer"""
 import logging
+import re
+import threading
+import time
 import zipfile
 import io
+from collections import OrderedDict
+from functools import lru_cache
 from pathlib import Path
 from typing import List, Dict, Any, Optional, Tuple
 from lxml import etree
@@ -13,6 +18,52 @@ from datetime import datetime
 from src.infrastructure.database.somex_repository import SomexRepository
 from src.infrastructure.sftp.somex_sftp_client import SomexSftpClient
 
+_ZERO = Decimal('0')
+_HUNDRED = Decimal('100')
+
+# "X {number} KILO(S)" inside product names, e.g. "SAL SOMEX CEBA X 40 KILOS"
+_KILOS_RE = re.compile(r'X\s*(\d+(?:\.\d+)?)\s*KIL', re.IGNORECASE)
+
+# Leading digits + letters of an invoice number, e.g. "2B" in "2B286170"
+_INVOICE_NUMBER_RE = re.compile(r'^(\d+[A-Za-z]+)(.+)$')
+
+
+@lru_cache(maxsize=1024)
+def _to_decimal(value: str) -> Decimal:
+    """
+    Convert an XML amount to Decimal, zero when empty
+
+    Decimals are immutable, so results are shared across lines; quantities,
+    tax percentages and kilos repeat heavily between invoice lines.
+
+    Args:
+        value: Amount text from the XML
+
+    Returns:
+        Decimal value
+    """
+    return Decimal(value) if value else _ZERO
+
+
+def _header_xpath(step: str, namespaces: Dict[str, str]) -> etree.XPath:
+    """
+    Compile a descendant search that skips the cac:InvoiceLine subtrees
+
+    UBL places every document-level field before the invoice lines, so a
+    field that is missing no longer costs a walk over every line item.
+
+    Args:
+        step: Location path relative to the match, e.g. 'cbc:IssueDate'
+        namespaces: Prefix to namespace URI mapping
+
+    Returns:
+        Compiled XPath returning the matches in document order
+    """
+    return etree.XPath(
+        f'./*[not(self::cac:InvoiceLine)]/descendant-or-self::{step}',
+        namespaces=namespaces
+    )
+
 
 class ItemsImporter:
     """Helper class to import items from Excel file"""
@@ -53,34 +104,42 @@ class ItemsImporter:
 
             self.logger.info(f"Excel headers: {headers}")
 
-            # Map expected columns (case insensitive)
-            column_map = {}
+            # Map expected columns (case and space insensitive)
             expected_columns = [
                 'CodigoItem', 'Referencia', 'Descripcion', 'IdPlan', 'DescPlan',
                 'IdMayor', 'DescripcionPlan', 'RowIdItem', 'Categoria'
             ]
 
-            for expected in expected_columns:
-                for idx, header in enumerate(headers):
-                    if header and expected.lower() == str(header).lower().replace(' ', ''):
-                        column_map[expected] = idx
-                        break
+            # Normalize each header once; the first matching column wins
+            header_index = {}
+            for idx, header in enumerate(headers):
+                if header:
+                    header_index.setdefault(str(header).lower().replace(' ', ''), idx)
+
+            column_map = {
+                expected: header_index[expected.lower()]
+                for expected in expected_columns
+                if expected.lower() in header_index
+            }
 
             self.logger.info(f"Column mapping: {column_map}")
 
+            # Resolve item field -> column index once, not on every row
+            fields = (
+                ('codigo_item', column_map.get('CodigoItem', 0)),
+                ('referencia', column_map.get('Referencia', 1)),
+                ('descripcion', column_map.get('Descripcion', 2)),
+                ('id_plan', column_map.get('IdPlan', 3)),
+                ('desc_plan', column_map.get('DescPlan', 4)),
+                ('id_mayor', column_map.get('IdMayor', 5)),
+                ('descripcion_plan', column_map.get('DescripcionPlan', 6)),
+                ('row_id_item', column_map.get('RowIdItem', 7)),
+                ('categoria', column_map.get('Categoria', 8)),
+            )
+
             # Read data rows
             for row in ws.iter_rows(min_row=2, values_only=True):
-                item = {
-                    'codigo_item': str(row[column_map.get('CodigoItem', 0)] or '').strip(),
-                    'referencia': str(row[column_map.get('Referencia', 1)] or '').strip(),
-                    'descripcion': str(row[column_map.get('Descripcion', 2)] or '').strip(),
-                    'id_plan': str(row[column_map.get('IdPlan', 3)] or '').strip(),
-                    'desc_plan': str(row[column_map.get('DescPlan', 4)] or '').strip(),
-                    'id_mayor': str(row[column_map.get('IdMayor', 5)] or '').strip(),
-                    'descripcion_plan': str(row[column_map.get('DescripcionPlan', 6)] or '').strip(),
-                    'row_id_item': str(row[column_map.get('RowIdItem', 7)] or '').strip(),
-                    'categoria': str(row[column_map.get('Categoria', 8)] or '').strip(),
-                }
+                item = {key: str(row[idx] or '').strip() for key, idx in fields}
 
                 # Only add if has codigo_item
                 if item['codigo_item']:
@@ -113,6 +172,16 @@ class SomexProcessorService:
         'ext': 'urn:oasis:names:specification:ubl:schema:xsd:CommonExtensionComponents-2',
     }
 
+    # Document-level Invoice fields, looked up outside the invoice lines
+    _ORDER_REFERENCE_ID_XPATH = _header_xpath('cac:OrderReference/cbc:ID', NAMESPACES)
+    _DOCUMENT_ID_XPATH = _header_xpath('cbc:ID', NAMESPACES)
+    _ISSUE_DATE_XPATH = _header_xpath('cbc:IssueDate', NAMESPACES)
+    _RECEIVER_PARTY_XPATH = _header_xpath('cac:ReceiverParty', NAMESPACES)
+    # Both payment-date elements in one scan (see _get_payment_date)
+    _PAYMENT_DATE_XPATH = _header_xpath(
+        '*[self::cbc:PaymentDueDate or self::cbc:DueDate]', NAMESPACES
+    )
+
     def __init__(
         self,
         repository: SomexRepository,
@@ -121,9 +190,57 @@ class SomexProcessorService:
     ):
         self.repository = repository
         self.logger = logger
-        self.output_dir = Path(output_dir)
+        # Resolve once so later exports don't depend on the current cwd
+        self.output_dir = Path(output_dir).resolve()
         self.output_dir.mkdir(parents=True, exist_ok=True)
 
+        # Cache of catalog lookups: product_code -> (timestamp, item or None)
+        self._item_cache: OrderedDict[str, Tuple[float, Optional[Dict[str, Any]]]] = OrderedDict()
+        self._item_cache_lock = threading.Lock()
+        self._item_cache_ttl = 300
+        self._item_cache_max = 256
+
+    def _get_catalog_item(self, product_code: str) -> Optional[Dict[str, Any]]:
+        """
+        Get catalog item by code, caching results so repeated product codes
+        across invoice lines don't hit the database every time
+
+        Args:
+            product_code: Item code from the invoice line
+
+        Returns:
+            Item dictionary or None if not in the catalog
+        """
+        now = time.time()
+        with self._item_cache_lock:
+            cached = self._item_cache.get(product_code)
+            if cached is not None and now - cached[0] < self._item_cache_ttl:
+                self._item_cache.move_to_end(product_code)
+                return cached[1]
+
+        item_data = self.repository.get_item_by_code(product_code)
+
+        with self._item_cache_lock:
+            self._item_cache[product_code] = (now, item_data)
+            self._item_cache.move_to_end(product_code)
+            while len(self._item_cache) > self._item_cache_max:
+                self._item_cache.popitem(last=False)
+
+        return item_data
+
+    def invalidate_item_cache(self, product_code: Optional[str] = None) -> None:
+        """
+        Drop cached catalog lookups
+
+        Args:
+            product_code: Code to invalidate; if None the whole cache is cleared
+        """
+        with self._item_cache_lock:
+            if product_code is None:
+                self._item_cache.clear()
+            else:
+                self._item_cache.pop(product_code, None)
+
     def extract_xmls_from_zip(self, zip_path: str) -> List[Tuple[str, bytes]]:
         """
         Extract XML files from a ZIP archive
@@ -366,26 +483,22 @@ class SomexProcessorService:
         """
         try:
             # Extract invoice number from OrderReference (NOT from main cbc:ID)
-            invoice_number = self._get_text(tree, './/cac:OrderReference/cbc:ID')
+            invoice_number = self._get_header_text(tree, self._ORDER_REFERENCE_ID_XPATH)
             if not invoice_number:
                 # Fallback to main ID if no OrderReference
-                invoice_number = self._get_text(tree, './/cbc:ID')
+                invoice_number = self._get_header_text(tree, self._DOCUMENT_ID_XPATH)
 
             # Format invoice number (e.g., 2B286170 -> 2B-286170)
             if invoice_number:
                 invoice_number = self._format_invoice_number(invoice_number)
 
             # Extract dates
-            invoice_date = self._get_text(tree, './/cbc:IssueDate')
-            payment_date = self._get_text(tree, './/cbc:PaymentDueDate')
-            if not payment_date:
-                payment_date = self._get_text(tree, './/cbc:DueDate')
+            invoice_date = self._get_header_text(tree, self._ISSUE_DATE_XPATH)
+            payment_date = self._get_payment_date(tree)
 
             # Extract buyer information from ReceiverParty (NOT AccountingCustomerParty)
-            buyer_party = tree.find(
-                './/cac:ReceiverParty',
-                self.NAMESPACES
-            )
+            receiver_parties = self._RECEIVER_PARTY_XPATH(tree)
+            buyer_party = receiver_parties[0] if receiver_parties else None
 
             buyer_nit = ""
             buyer_name = ""
@@ -422,7 +535,11 @@ class SomexProcessorService:
             }
 
             # Extract line items using Somex-specific parsing
-            lines = tree.findall('.//cac:InvoiceLine', self.NAMESPACES)
+            # UBL lines are children of the Invoice root; only search the
+            # whole document for documents that nest them elsewhere
+            lines = tree.findall('cac:InvoiceLine', self.NAMESPACES)
+            if not lines:
+                lines = tree.findall('.//cac:InvoiceLine', self.NAMESPACES)
             self.logger.info(f"Found {len(lines)} invoice lines for invoice {invoice_number}")
 
             if len(lines) == 0:
@@ -430,17 +547,21 @@ class SomexProcessorService:
                 self.logger.warning("XML structure (first 1000 chars):")
                 self.logger.warning(etree.tostring(tree, pretty_print=True).decode()[:1000])
 
+            # Per-line traces are only formatted when DEBUG is enabled
+            debug = self.logger.isEnabledFor(logging.DEBUG)
             for idx, line in enumerate(lines, 1):
-                self.logger.info(f"Parsing Somex line item {idx}/{len(lines)}")
+                if debug:
+                    self.logger.debug(f"Parsing Somex line item {idx}/{len(lines)}")
                 item = self._parse_somex_line_item(line)
                 if item:
                     invoice_data['items'].append(item)
-                    self.logger.info(
-                        f"  ✓ Product: {item['product_name']}, "
-                        f"Code: {item['product_code']}, "
-                        f"Qty Original: {item['quantity_original']}, "
-                        f"Qty Adjusted: {item['quantity_adjusted']}"
-                    )
+                    if debug:
+                        self.logger.debug(
+                            f"  ✓ Product: {item['product_name']}, "
+                            f"Code: {item['product_code']}, "
+                            f"Qty Original: {item['quantity_original']}, "
+                            f"Qty Adjusted: {item['quantity_adjusted']}"
+                        )
                 else:
                     self.logger.warning(f"  ✗ Failed to parse line item {idx}")
 
@@ -455,6 +576,30 @@ class SomexProcessorService:
             self.logger.error(f"Error parsing Somex invoice: {e}", exc_info=True)
             return None
 
+    def _get_payment_date(self, tree) -> str:
+        """
+        Get the payment due date, preferring cbc:PaymentDueDate over cbc:DueDate
+
+        Walks the tree once for both elements instead of searching it again
+        for cbc:DueDate whenever cbc:PaymentDueDate is missing.
+
+        Args:
+            tree: Root element of Invoice
+
+        Returns:
+            Date text or empty string if neither element has a value
+        """
+        # Only the first element of each kind counts, as with _get_text
+        first = {}
+        for element in self._PAYMENT_DATE_XPATH(tree):
+            first.setdefault(etree.QName(element).localname, element)
+
+        for name in ('PaymentDueDate', 'DueDate'):
+            element = first.get(name)
+            if element is not None and element.text and element.text.strip():
+                return element.text.strip()
+        return ""
+
     def _extract_kilos_from_name(self, product_name: str) -> Optional[Decimal]:
         """
         Extract kilos from product name
@@ -466,16 +611,13 @@ class SomexProcessorService:
         Returns:
             Kilos as Decimal or None if not found
         """
-        import re
-
         try:
-            # Look for pattern "X {number} KILO"
-            pattern = r'[Xx]\s*(\d+(?:\.\d+)?)\s*[Kk][Ii][Ll]'
-            match = re.search(pattern, product_name)
+            match = _KILOS_RE.search(product_name)
 
             if match:
-                kilos = Decimal(match.group(1))
-                self.logger.debug(f"Extracted {kilos} kilos from '{product_name}'")
+                kilos = _to_decimal(match.group(1))
+                if self.logger.isEnabledFor(logging.DEBUG):
+                    self.logger.debug(f"Extracted {kilos} kilos from '{product_name}'")
                 return kilos
 
             return None
@@ -495,61 +637,71 @@ class SomexProcessorService:
             Dictionary with item data or None
         """
         try:
+            # Locate the shared Item and TaxSubtotal blocks once and read
+            # their fields relative to them instead of re-walking the line
+            item_element = line_element.find('.//cac:Item', self.NAMESPACES)
+            tax_subtotal = line_element.find(
+                './/cac:TaxTotal/cac:TaxSubtotal', self.NAMESPACES
+            )
+
             # Product name from Note
             product_name = self._get_text(line_element, './/cbc:Note')
             if not product_name:
                 # Fallback to Description
-                product_name = self._get_text(line_element, './/cac:Item/cbc:Description')
+                product_name = self._get_text(item_element, 'cbc:Description')
 
             # Product code from StandardItemIdentification
             product_code = self._get_text(
-                line_element,
-                './/cac:Item/cac:StandardItemIdentification/cbc:ID'
+                item_element, 'cac:StandardItemIdentification/cbc:ID'
             )
             if not product_code:
                 # Fallback to SellersItemIdentification
                 product_code = self._get_text(
-                    line_element,
-                    './/cac:Item/cac:SellersItemIdentification/cbc:ID'
+                    item_element, 'cac:SellersItemIdentification/cbc:ID'
                 )
 
             # Original quantity from XML
             quantity_str = self._get_text(line_element, './/cbc:InvoicedQuantity')
-            quantity_original = Decimal(quantity_str) if quantity_str else Decimal('0')
+            quantity_original = _to_decimal(quantity_str)
+
+            debug = self.logger.isEnabledFor(logging.DEBUG)
 
             # Try to extract kilos from database item description first
             kilos = None
             item_description = None
             if product_code and self.repository:
-                item_data = self.repository.get_item_by_code(product_code)
+                item_data = self._get_catalog_item(product_code)
                 if item_data:
                     item_description = item_data.get('descripcion', '')
-                    self.logger.debug(
-                        f"Found item in DB: code={product_code}, desc={item_description}"
-                    )
+                    if debug:
+                        self.logger.debug(
+                            f"Found item in DB: code={product_code}, desc={item_description}"
+                        )
                     kilos = self._extract_kilos_from_name(item_description)
-                    if kilos:
-                        self.logger.info(
+                    if kilos and debug:
+                        self.logger.debug(
                             f"Extracted {kilos} kilos from DB description for code {product_code}"
                         )
 
             # Fallback to extracting kilos from XML product name
             if not kilos:
-                self.logger.debug(
-                    f"No kilos found in DB for code {product_code}, trying XML product name"
-                )
+                if debug:
+                    self.logger.debug(
+                        f"No kilos found in DB for code {product_code}, trying XML product name"
+                    )
                 kilos = self._extract_kilos_from_name(product_name)
-                if kilos:
-                    self.logger.info(
+                if kilos and debug:
+                    self.logger.debug(
                         f"Extracted {kilos} kilos from XML product name"
                     )
 
             # Calculate adjusted quantity (quantity * kilos)
             if kilos:
                 quantity_adjusted = quantity_original * kilos
-                self.logger.debug(
-                    f"Adjusted quantity: {quantity_original} * {kilos} = {quantity_adjusted}"
-                )
+                if debug:
+                    self.logger.debug(
+                        f"Adjusted quantity: {quantity_original} * {kilos} = {quantity_adjusted}"
+                    )
             else:
                 quantity_adjusted = quantity_original
                 self.logger.warning(
@@ -558,31 +710,23 @@ class SomexProcessorService:
                 )
 
             # Taxable amount (subtotal before tax)
-            taxable_amount_str = self._get_text(
-                line_element,
-                './/cac:TaxTotal/cac:TaxSubtotal/cbc:TaxableAmount'
-            )
-            taxable_amount = (
-                Decimal(taxable_amount_str) if taxable_amount_str else Decimal('0')
-            )
+            taxable_amount_str = self._get_text(tax_subtotal, 'cbc:TaxableAmount')
+            taxable_amount = _to_decimal(taxable_amount_str)
 
             # Calculate unit price: taxable_amount / adjusted_quantity
             if quantity_adjusted > 0:
                 unit_price = taxable_amount / quantity_adjusted
             else:
-                unit_price = Decimal('0')
+                unit_price = _ZERO
 
             # Tax percentage
             tax_percent_str = self._get_text(
-                line_element,
-                './/cac:TaxTotal/cac:TaxSubtotal/cac:TaxCategory/cbc:Percent'
-            )
-            tax_percentage = (
-                Decimal(tax_percent_str) if tax_percent_str else Decimal('0')
+                tax_subtotal, 'cac:TaxCategory/cbc:Percent'
             )
+            tax_percentage = _to_decimal(tax_percent_str)
 
             # Calculate line total (taxable amount + tax)
-            tax_amount = taxable_amount * (tax_percentage / Decimal('100'))
+            tax_amount = taxable_amount * (tax_percentage / _HUNDRED)
             line_total = taxable_amount + tax_amount
 
             return {
@@ -619,7 +763,7 @@ class SomexProcessorService:
 
             # Quantity
             quantity_str = self._get_text(line_element, './/cbc:InvoicedQuantity')
-            quantity = Decimal(quantity_str) if quantity_str else Decimal('0')
+            quantity = _to_decimal(quantity_str)
 
             # Unit of measure
             unit_elem = line_element.find(
@@ -634,16 +778,14 @@ class SomexProcessorService:
             price_str = self._get_text(
                 line_element, './/cac:Price/cbc:PriceAmount'
             )
-            unit_price = Decimal(price_str) if price_str else Decimal('0')
+            unit_price = _to_decimal(price_str)
 
             # Tax percentage
             tax_percent_str = self._get_text(
                 line_element,
                 './/cac:TaxTotal/cac:TaxSubtotal/cbc:Percent'
             )
-            tax_percentage = (
-                Decimal(tax_percent_str) if tax_percent_str else Decimal('0')
-            )
+            tax_percentage = _to_decimal(tax_percent_str)
 
             return {
                 'product_name': product_name or "",
@@ -668,6 +810,13 @@ class SomexProcessorService:
             return result.text.strip()
         return ""
 
+    def _get_header_text(self, tree, xpath: etree.XPath) -> str:
+        """Get text of the first document-level match of a header XPath"""
+        matches = xpath(tree)
+        if matches and matches[0].text:
+            return matches[0].text.strip()
+        return ""
+
     def _format_invoice_number(self, invoice_number: str) -> str:
         """
         Format invoice number by adding a hyphen after the initial number+letter pattern
@@ -679,15 +828,11 @@ class SomexProcessorService:
         Returns:
             Formatted invoice number with hyphen
         """
-        import re
-
         if not invoice_number:
             return invoice_number
 
-        # Pattern: starts with digit(s) followed by letter(s), then remaining characters
-        # Match: one or more digits, followed by one or more letters
-        pattern = r'^(\d+[A-Za-z]+)(.+)$'
-        match = re.match(pattern, invoice_number)
+        # Starts with digit(s) followed by letter(s), then remaining characters
+        match = _INVOICE_NUMBER_RE.match(invoice_number)
 
         if match:
             prefix = match.group(1)  # e.g., "2B"
@@ -707,6 +852,27 @@ class SomexProcessorService:
         # Replace dot with comma for decimal separator
         return formatted.replace('.', ',')
 
+    def _format_financial(self, item: Dict[str, Any]) -> Tuple[str, str, str, str]:
+        """
+        Format the financial columns of a consolidated row in one pass
+
+        Args:
+            item: Item data dictionary
+
+        Returns:
+            Tuple (quantity, unit_price, line_total, quantity_original) formatted
+        """
+        quantity = item.get('quantity_adjusted')
+        if quantity is None:
+            quantity = item.get('quantity', _ZERO)
+
+        return (
+            self.format_decimal(quantity),
+            self.format_decimal(item.get('unit_price', _ZERO)),
+            self.format_decimal(item.get('line_total', _ZERO)),
+            self.format_decimal(item.get('quantity_original', _ZERO)),
+        )
+
     def create_excel_template(
         self,
         invoice_data: Dict[str, Any],
@@ -788,12 +954,12 @@ class SomexProcessorService:
 
             # Quantity with 5 decimals and comma separator
             ws.cell(row=row_num, column=5).value = self.format_decimal(
-                item.get('quantity', Decimal('0'))
+                item.get('quantity', _ZERO)
             )
 
             # Unit price with 5 decimals and comma separator
             ws.cell(row=row_num, column=6).value = self.format_decimal(
-                item.get('unit_price', Decimal('0'))
+                item.get('unit_price', _ZERO)
             )
 
             ws.cell(row=row_num, column=7).value = invoice_data.get(
@@ -829,14 +995,14 @@ class SomexProcessorService:
 
             # Cantidad Original with 5 decimals and comma separator
             ws.cell(row=row_num, column=21).value = self.format_decimal(
-                item.get('quantity', Decimal('0'))
+                item.get('quantity', _ZERO)
             )
 
             ws.cell(row=row_num, column=22).value = ""  # Moneda
 
             # Valor Total Línea (5 decimales - separador coma)
             ws.cell(row=row_num, column=23).value = self.format_decimal(
-                item.get('line_total', Decimal('0'))
+                item.get('line_total', _ZERO)
             )
 
             row_num += 1
@@ -900,6 +1066,13 @@ class SomexProcessorService:
                 #     results['skipped_xmls'] += 1
                 #     continue
 
+                # Empty entries carry no invoice; skip them before lxml
+                # fails on them and logs a full traceback
+                if not xml_content.strip():
+                    self.logger.warning(f"Empty XML skipped: {xml_filename}")
+                    results['failed_xmls'] += 1
+                    continue
+
                 # Parse XML
                 invoice_data = self.parse_invoice_xml(xml_content)
 
@@ -1029,6 +1202,8 @@ class SomexProcessorService:
             )
 
             for item in items:
+                qty_s, price_s, total_s, qty_o_s = self._format_financial(item)
+
                 # N° Factura
                 ws.cell(row=row_num, column=1).value = invoice_data.get(
                     'invoice_number', ''
@@ -1041,14 +1216,10 @@ class SomexProcessorService:
                 ws.cell(row=row_num, column=4).value = 'KG'
 
                 # Cantidad (5 decimales - separador coma) - AJUSTADA con kilos
-                ws.cell(row=row_num, column=5).value = self.format_decimal(
-                    item.get('quantity_adjusted', item.get('quantity', Decimal('0')))
-                )
+                ws.cell(row=row_num, column=5).value = qty_s
 
                 # Precio Unitario (5 decimales - separador coma)
-                ws.cell(row=row_num, column=6).value = self.format_decimal(
-                    item.get('unit_price', Decimal('0'))
-                )
+                ws.cell(row=row_num, column=6).value = price_s
 
                 # Fecha Factura Año-Mes-Dia
                 ws.cell(row=row_num, column=7).value = invoice_data.get(
@@ -1092,17 +1263,13 @@ class SomexProcessorService:
                 ws.cell(row=row_num, column=20).value = ""
 
                 # Cantidad Original (5 decimales - separador coma) - SIN ajustar
-                ws.cell(row=row_num, column=21).value = self.format_decimal(
-                    item.get('quantity_original', Decimal('0'))
-                )
+                ws.cell(row=row_num, column=21).value = qty_o_s
 
                 # Moneda (1,2,3) - siempre 1
                 ws.cell(row=row_num, column=22).value = "1"
 
                 # Valor Total Línea (5 decimales - separador coma)
-                ws.cell(row=row_num, column=23).value = self.format_decimal(
-                    item.get('line_total', Decimal('0'))
-                )
+                ws.cell(row=row_num, column=23).value = total_s
 
                 row_num += 1
 
@@ -1,6 +1,7 @@
 """Email Repository Interface - Domain Layer"""
 from abc import ABC, abstractmethod
-from typing import List, Tuple
+from email.message import Message
+from typing import Dict, List, Optional, Tuple, Union
 from src.domain.entities.client import Client
 
 
@@ -18,13 +19,19 @@ class EmailRepository(ABC):
         pass
 
     @abstractmethod
-    def fetch_email(self, email_id: str) -> Tuple[bytes, dict]:
-        """Fetch email by ID"""
+    def fetch_email(self, email_id: str) -> Tuple[Union[bytes, Message], dict]:
+        """Fetch email by ID (raw bytes or an already-parsed message)"""
         pass
 
+    def fetch_emails(self, email_ids: List[str]) -> Dict[str, Tuple[Union[bytes, Message], dict]]:
+        """Fetch several emails by ID (one request per email by default)"""
+        return {email_id: self.fetch_email(email_id) for email_id in email_ids}
+
     @abstractmethod
-    def extract_attachments(self, email_data: bytes) -> List[Tuple[str, bytes]]:
-        """Extract attachments from email"""
+    def extract_attachments(self, email_data: Union[bytes, Message],
+                            extensions: Optional[Tuple[str, ...]] = None) -> List[Tuple[str, bytes]]:
+        """Extract attachments from email data returned by fetch_email,
+        optionally only those whose filename ends with one of ``extensions``"""
         pass
 
     @abstractmethod
@@ -2,7 +2,8 @@
 import logging
 import zipfile
 import io
-from typing import List
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, List, Tuple, Union
 from datetime import datetime
 from src.domain.entities.client import Client
 from src.domain.entities.invoice import Invoice
@@ -16,6 +17,9 @@ from src.domain.repositories.csv_repository import CSVRepository
 class ProcessInvoicesUseCase:
     """Use case for processing invoices from emails"""
 
+    # Emails fetched per server round-trip (bounds memory for large mailboxes)
+    FETCH_BATCH_SIZE = 20
+
     def __init__(
         self,
         email_repo: EmailRepository,
@@ -59,35 +63,57 @@ class ProcessInvoicesUseCase:
 
             invoices = []
 
+            pending_ids = []
             for email_id in email_ids:
                 # Check if already processed (skip if not reprocessing)
                 if not allow_reprocess and self.database_repo.is_email_processed(email_id):
                     self.logger.info(f"Email {email_id} already processed, skipping")
                     continue
-
-                try:
-                    # Fetch email
-                    email_data, email_info = self.email_repo.fetch_email(email_id)
-                    result.increment_emails()
-
-                    # Extract attachments
-                    attachments = self.email_repo.extract_attachments(email_data)
-
-                    # Process ZIP files
-                    for filename, content in attachments:
-                        if filename.lower().endswith('.zip'):
-                            invoice = self._process_zip_attachment(content, client)
-                            if invoice:
-                                invoices.append(invoice)
-                                result.increment_invoices()
-
-                    # Mark email as processed
-                    self.database_repo.mark_email_processed(email_id, datetime.now())
-
-                except Exception as e:
-                    error_msg = f"Error processing email {email_id}: {str(e)}"
-                    self.logger.error(error_msg)
-                    result.add_error(error_msg)
+                pending_ids.append(email_id)
+
+            # Fetch emails in batches (one server round-trip per batch); the
+            # next batch is downloaded while the current one is processed.
+            # Only the prefetch thread talks to the server, one batch at a time.
+            batches = [
+                pending_ids[start:start + self.FETCH_BATCH_SIZE]
+                for start in range(0, len(pending_ids), self.FETCH_BATCH_SIZE)
+            ]
+
+            with ThreadPoolExecutor(max_workers=1) as prefetcher:
+                next_batch = prefetcher.submit(self._fetch_batch, batches[0]) if batches else None
+
+                for index, batch_ids in enumerate(batches):
+                    fetched = next_batch.result()
+                    if index + 1 < len(batches):
+                        next_batch = prefetcher.submit(self._fetch_batch, batches[index + 1])
+
+                    for email_id in batch_ids:
+                        try:
+                            fetched_email = fetched.pop(email_id)
+                            if isinstance(fetched_email, Exception):
+                                raise fetched_email
+                            email_data, email_info = fetched_email
+                            result.increment_emails()
+
+                            # Extract ZIP attachments (other attachments are never decoded)
+                            attachments = self.email_repo.extract_attachments(
+                                email_data, extensions=('.zip',)
+                            )
+
+                            # Process ZIP files
+                            for filename, content in attachments:
+                                invoice = self._process_zip_attachment(content, client)
+                                if invoice:
+                                    invoices.append(invoice)
+                                    result.increment_invoices()
+
+                            # Mark email as processed
+                            self.database_repo.mark_email_processed(email_id, datetime.now())
+
+                        except Exception as e:
+                            error_msg = f"Error processing email {email_id}: {str(e)}"
+                            self.logger.error(error_msg)
+                            result.add_error(error_msg)
 
             # Export invoices to CSV
             if invoices:
@@ -105,6 +131,28 @@ class ProcessInvoicesUseCase:
 
         return result
 
+    def _fetch_batch(self, email_ids: List[str]) -> Dict[str, Union[Tuple, Exception]]:
+        """Fetch a batch of emails, one by one if the batch request fails
+
+        Returns:
+            Dictionary mapping email ID to (email_data, email_info), or to the
+            exception raised while fetching that email
+        """
+        try:
+            fetched = self.email_repo.fetch_emails(email_ids)
+        except Exception as e:
+            self.logger.warning(f"Batch fetch failed, fetching emails one by one: {e}")
+            fetched = {}
+
+        for email_id in email_ids:
+            if email_id not in fetched:
+                try:
+                    fetched[email_id] = self.email_repo.fetch_email(email_id)
+                except Exception as e:
+                    fetched[email_id] = e
+
+        return fetched
+
     def _process_zip_attachment(self, zip_content: bytes, client: Client) -> Invoice:
         """Process ZIP attachment to extract invoice"""
         try:
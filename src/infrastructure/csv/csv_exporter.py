@@ -1,23 +1,50 @@
 """CSV Exporter Implementation - Infrastructure Layer"""
 import csv
+import logging
+import re
+import sqlite3
 from pathlib import Path
-from typing import List, Optional
+from typing import Iterable, Iterator, List, Optional
 from datetime import datetime
-from decimal import Decimal
+from decimal import Decimal, InvalidOperation
 from src.domain.entities.invoice import Invoice
 from src.domain.entities.client import Client
 from src.domain.repositories.csv_repository import CSVRepository
 from src.infrastructure.database.sqlite_repository import SQLiteRepository
 
+# Characters that force csv.writer (excel dialect) to quote a field
+_QUOTE_TRIGGERS = '"\r\n'
+_NEEDS_QUOTING_RE = re.compile('["\r\n]')
+
+# Rows joined into a single write() on the fast path
+_WRITE_BATCH_ROWS = 1000
+
 
 class CSVExporter(CSVRepository):
     """CSV export implementation"""
 
-    def __init__(self):
-        """Initialize CSV exporter with database repository for product lookup"""
-        # Initialize database repository for Pulgarin products
-        db_path = Path("data") / "app.db"
-        self.db_repo = SQLiteRepository(str(db_path))
+    def __init__(self, db_repo: Optional[SQLiteRepository] = None,
+                 db_path: str = str(Path("data") / "app.db")):
+        """Initialize CSV exporter
+
+        Args:
+            db_repo: Repository with Pulgarin products (optional, shared if given)
+            db_path: Database opened on first Pulgarin export when db_repo is None
+        """
+        self._db_repo = db_repo
+        self._db_path = db_path
+        self.logger = logging.getLogger(__name__)
+
+    @property
+    def db_repo(self) -> SQLiteRepository:
+        """Pulgarin products repository, opened lazily on first use
+
+        Only Pulgarin exports need product lookups, so other clients never
+        touch the database.
+        """
+        if self._db_repo is None:
+            self._db_repo = SQLiteRepository(self._db_path)
+        return self._db_repo
 
     def export_invoice(self, invoice: Invoice, client: Client, output_path: str) -> str:
         """Export single invoice to CSV"""
@@ -70,132 +97,270 @@ class CSVExporter(CSVRepository):
         if is_pulgarin:
             headers.extend(['Peso', 'U/M BD', 'Valor Total'])
 
-        # Write CSV with UTF-8-BOM encoding
-        with open(filepath, 'w', newline='', encoding='utf-8-sig') as csvfile:
+        # Preload all Pulgarin products referenced by this export in one pass
+        products_by_code, products_by_desc = {}, {}
+        if is_pulgarin:
+            products_by_code, products_by_desc = self._preload_pulgarin_products(invoices)
+
+        # Write CSV with UTF-8-BOM encoding (large buffer: fewer write syscalls)
+        with open(filepath, 'w', newline='', encoding='utf-8-sig',
+                  buffering=1 << 20) as csvfile:
             writer = csv.writer(csvfile, delimiter=client.csv_delimiter)
             writer.writerow(headers)
-
-            for invoice in invoices:
-                for item in invoice.items:
-                    # For Pulgarin, calculate converted quantity and unit price
-                    if is_pulgarin:
-                        peso_str, um_bd, product = self._lookup_pulgarin_product(item)
-
-                        # Calculate converted quantity and unit price
-                        if product and peso_str:
-                            try:
-                                # Convert peso to Decimal (remove any non-numeric chars except . and ,)
-                                peso_clean = peso_str.replace(',', '.')
-                                peso_decimal = Decimal(peso_clean)
-
-                                # Cantidad Convertida = Cantidad Original × Peso
-                                cantidad_convertida = item.quantity * peso_decimal
-
-                                # Precio Unitario = TaxableAmount (Valor sin IVA) ÷ Cantidad Convertida
-                                # TaxableAmount es el valor base antes de impuestos (<cbc:TaxableAmount>)
-                                valor_total = item.get_subtotal()  # Subtotal sin IVA
-                                if cantidad_convertida > 0:
-                                    precio_unitario = valor_total / cantidad_convertida
-                                else:
-                                    # Fallback to original if conversion fails
-                                    cantidad_convertida = item.quantity
-                                    precio_unitario = item.unit_price
-                                    valor_total = item.get_subtotal()
-
-                                # Format peso with client's decimal separator
-                                peso_str = self._format_decimal(peso_decimal, client)
-                            except (ValueError, Decimal.InvalidOperation):
-                                # If conversion fails, use original values
-                                cantidad_convertida = item.quantity
-                                precio_unitario = item.unit_price
-                                valor_total = item.get_subtotal()
-                        else:
-                            # Product not found or no peso, use original values
-                            cantidad_convertida = item.quantity
-                            precio_unitario = item.unit_price
-                            valor_total = item.get_subtotal()
-                            peso_str = ''
-                            um_bd = ''
-                    else:
-                        # For non-Pulgarin clients, use original values
-                        cantidad_convertida = item.quantity
-                        precio_unitario = item.unit_price
-
-                    row = [
-                        invoice.invoice_number,
-                        item.product_name,
-                        item.subyacente_code,  # Código subyacente (SPN-1)
-                        item.unit_of_measure,
-                        self._format_decimal(cantidad_convertida, client),  # Cantidad Convertida for Pulgarin
-                        self._format_decimal(precio_unitario, client),  # Precio Unitario recalculado for Pulgarin
-                        invoice.invoice_date.strftime('%Y-%m-%d') if invoice.invoice_date else '',
-                        invoice.payment_date.strftime('%Y-%m-%d') if invoice.payment_date else '',
-                        invoice.buyer_nit,
-                        invoice.buyer_name,
-                        invoice.seller_nit,
-                        invoice.seller_name,
-                        invoice.principal_vc,  # V = Vendedor
-                        invoice.municipality,
-                        self._format_decimal(item.tax_percentage, client, use_decimal_places=False),
-                        invoice.description or '',  # Nota de la factura
-                        invoice.active,  # Siempre 1
-                        invoice.invoice_active,  # Siempre 1
-                        invoice.warehouse or '',
-                        invoice.incentive or '',
-                        self._format_decimal(item.quantity, client),  # Cantidad Original (sin conversión)
-                        invoice.currency  # 1=COP, 2=USD, 3=EUR
-                    ]
-
-                    # Add Pulgarin-specific product data from database
-                    if is_pulgarin:
-                        valor_total_str = self._format_decimal(valor_total, client)
-                        row.extend([peso_str, um_bd, valor_total_str])
-
-                    writer.writerow(row)
+            self._write_rows(
+                csvfile,
+                writer,
+                self._iter_rows(invoices, client, is_pulgarin,
+                                products_by_code, products_by_desc),
+                client.csv_delimiter
+            )
 
         return str(filepath)
 
-    def _lookup_pulgarin_product(self, item) -> tuple:
-        """Lookup product in Pulgarin database and return (peso, um, product_dict)
+    @staticmethod
+    def _write_rows(csvfile, writer, rows: Iterable[list], delimiter: str) -> None:
+        """Write rows, joining them directly when no field needs quoting
+
+        Produces the same output as writer.writerows(rows). Rows where a
+        field contains the delimiter, a quote or a line break go through
+        the csv writer so they are quoted correctly.
+
+        Args:
+            csvfile: Open output file
+            writer: csv.writer bound to csvfile
+            rows: Rows to write
+            delimiter: Field delimiter used by writer
+        """
+        if delimiter in _QUOTE_TRIGGERS:
+            writer.writerows(rows)
+            return
+
+        needs_quoting = _NEEDS_QUOTING_RE.search
+        pending = []
+
+        for row in rows:
+            fields = ['' if value is None else str(value) for value in row]
+            line = delimiter.join(fields)
+
+            # Extra delimiters in the joined line mean a field contains one;
+            # csv also quotes a row made of a single empty field
+            if (not line or line.count(delimiter) != len(fields) - 1
+                    or needs_quoting(line)):
+                # Keep row order: flush plain rows before the quoted one
+                if pending:
+                    csvfile.write(''.join(pending))
+                    pending.clear()
+                writer.writerow(row)
+                continue
+
+            pending.append(line + '\r\n')
+            if len(pending) >= _WRITE_BATCH_ROWS:
+                csvfile.write(''.join(pending))
+                pending.clear()
+
+        if pending:
+            csvfile.write(''.join(pending))
+
+    def _iter_rows(self, invoices: List[Invoice], client: Client, is_pulgarin: bool,
+                   products_by_code: dict, products_by_desc: dict) -> Iterator[list]:
+        """Yield CSV rows for every invoice item, one at a time
+
+        Args:
+            invoices: Invoices to export
+            client: Client configuration (decimal format)
+            is_pulgarin: Whether to add Pulgarin product columns
+            products_by_code: Preloaded Pulgarin products keyed by codigo
+            products_by_desc: Preloaded Pulgarin products keyed by normalized description
+
+        Yields:
+            CSV row as a list of values
+        """
+        fmtdec, fmtdec_raw = self._decimal_formatters(client)
+        peso_cache = {}
+
+        for invoice in invoices:
+            # Invoice-level columns are identical for every item, build them once
+            invoice_number = invoice.invoice_number
+            invoice_cols = (
+                invoice.invoice_date.strftime('%Y-%m-%d') if invoice.invoice_date else '',
+                invoice.payment_date.strftime('%Y-%m-%d') if invoice.payment_date else '',
+                invoice.buyer_nit,
+                invoice.buyer_name,
+                invoice.seller_nit,
+                invoice.seller_name,
+                invoice.principal_vc,  # V = Vendedor
+                invoice.municipality,
+            )
+            status_cols = (
+                invoice.description or '',  # Nota de la factura
+                invoice.active,  # Siempre 1
+                invoice.invoice_active,  # Siempre 1
+                invoice.warehouse or '',
+                invoice.incentive or '',
+            )
+            currency = invoice.currency  # 1=COP, 2=USD, 3=EUR
+
+            for item in invoice.items:
+                cantidad_convertida = item.quantity
+                precio_unitario = item.unit_price
+
+                # For Pulgarin, calculate converted quantity and unit price
+                if is_pulgarin:
+                    valor_total = item.get_subtotal()  # Subtotal sin IVA
+
+                    # Repeated products reuse the already parsed peso
+                    key = (item.product_code, item.product_name)
+                    peso_info = peso_cache.get(key)
+                    if peso_info is None:
+                        peso_info = self._resolve_pulgarin_peso(
+                            item, products_by_code, products_by_desc, fmtdec
+                        )
+                        peso_cache[key] = peso_info
+                    peso_decimal, peso_str, um_bd = peso_info
+
+                    if peso_decimal is not None:
+                        # Cantidad Convertida = Cantidad Original × Peso
+                        convertida = item.quantity * peso_decimal
+
+                        # Precio Unitario = TaxableAmount (Valor sin IVA) ÷ Cantidad Convertida
+                        # TaxableAmount es el valor base antes de impuestos (<cbc:TaxableAmount>)
+                        # If the conversion gives zero, keep the original values
+                        if convertida > 0:
+                            cantidad_convertida = convertida
+                            precio_unitario = valor_total / convertida
+
+                row = [
+                    invoice_number,
+                    item.product_name,
+                    item.subyacente_code,  # Código subyacente (SPN-1)
+                    item.unit_of_measure,
+                    fmtdec(cantidad_convertida),  # Cantidad Convertida for Pulgarin
+                    fmtdec(precio_unitario),  # Precio Unitario recalculado for Pulgarin
+                    *invoice_cols,
+                    fmtdec_raw(item.tax_percentage),
+                    *status_cols,
+                    fmtdec(item.quantity),  # Cantidad Original (sin conversión)
+                    currency
+                ]
+
+                # Add Pulgarin-specific product data from database
+                if is_pulgarin:
+                    valor_total_str = fmtdec(valor_total)
+                    row.extend([peso_str, um_bd, valor_total_str])
+
+                yield row
+
+    def _preload_pulgarin_products(self, invoices: List[Invoice]) -> tuple:
+        """Fetch every Pulgarin product referenced by the invoices at once
+
+        Args:
+            invoices: Invoices about to be exported
+
+        Returns:
+            Tuple of (products by codigo, products by normalized description)
+        """
+        try:
+            codes = {item.product_code for invoice in invoices
+                     for item in invoice.items if item.product_code}
+            descs = {item.product_name for invoice in invoices
+                     for item in invoice.items}
+            return self.db_repo.find_products_bulk(codes, descs)
+
+        except (sqlite3.Error, OSError) as e:
+            # Export without product data rather than failing the export
+            self.logger.warning(f"Pulgarin products could not be loaded, exporting without them: {e}")
+            return {}, {}
+
+    def _resolve_pulgarin_peso(self, item, products_by_code: dict,
+                               products_by_desc: dict, fmtdec) -> tuple:
+        """Resolve the Pulgarin peso and U/M columns for an item
 
         Args:
             item: InvoiceItem to lookup
+            products_by_code: Products keyed by codigo
+            products_by_desc: Products keyed by normalized description
+            fmtdec: Client decimal formatter
 
         Returns:
-            Tuple of (peso, um, product_dict) or ('', '', None) if not found
+            Tuple of (peso as Decimal or None, peso column, U/M column).
+            The Decimal is None when the product is missing or its peso is
+            not a number; the peso column then keeps the raw database value.
         """
+        peso_str, um_bd, product = self._lookup_pulgarin_product(
+            item, products_by_code, products_by_desc
+        )
+
+        if not (product and peso_str):
+            # Product not found or no peso
+            return (None, '', '')
+
         try:
-            # Try to find product by code or description
-            product = self.db_repo.find_product_by_code_or_description(
-                codigo=item.product_code if item.product_code else None,
-                descripcion=item.product_name
-            )
+            # Peso is stored as text and may use a decimal comma
+            peso_decimal = Decimal(peso_str.replace(',', '.'))
+        except (ValueError, InvalidOperation):
+            return (None, peso_str, um_bd)
+
+        if not peso_decimal.is_finite():
+            return (None, peso_str, um_bd)
 
-            if product:
-                return (product.get('peso', ''), product.get('um', ''), product)
-            else:
-                # Product not found in database
-                return ('', '', None)
+        # Format peso with client's decimal separator
+        return (peso_decimal, fmtdec(peso_decimal), um_bd)
 
-        except Exception as e:
-            # In case of error, return empty values
+    def _lookup_pulgarin_product(self, item, products_by_code: dict,
+                                 products_by_desc: dict) -> tuple:
+        """Lookup product in preloaded Pulgarin products and return (peso, um, product_dict)
+
+        Args:
+            item: InvoiceItem to lookup
+            products_by_code: Products keyed by codigo
+            products_by_desc: Products keyed by normalized description
+
+        Returns:
+            Tuple of (peso, um, product_dict) or ('', '', None) if not found
+        """
+        # Try to find product by code first, then by description
+        product = None
+        if item.product_code:
+            product = products_by_code.get(item.product_code)
+        if product is None:
+            product = products_by_desc.get(
+                SQLiteRepository.normalize_text(item.product_name)
+            )
+
+        if product:
+            return (product.get('peso', ''), product.get('um', ''), product)
+        else:
+            # Product not found in database
             return ('', '', None)
 
-    def _format_decimal(self, value, client: Client, use_decimal_places: bool = True) -> str:
-        """Format decimal according to client configuration"""
-        if value is None:
-            return ''
+    @staticmethod
+    def _decimal_formatters(client: Client) -> tuple:
+        """Build the decimal formatters for a client's configuration
+
+        The format spec and separator choice are resolved once per export
+        instead of on every value.
+
+        Args:
+            client: Client configuration
+
+        Returns:
+            Tuple of (fmtdec, fmtdec_raw): fmtdec uses the client's decimal
+            places, fmtdec_raw formats the value as-is
+        """
+        fmt = ("{:." + str(client.decimal_places) + "f}").format
+        use_comma = client.decimal_separator == ','
+
+        if use_comma:
+            def fmtdec(value) -> str:
+                return '' if value is None else fmt(value).replace('.', ',')
 
-        if use_decimal_places:
-            # Format with specified decimal places
-            format_str = f"{{:.{client.decimal_places}f}}"
-            formatted = format_str.format(value)
+            def fmtdec_raw(value) -> str:
+                return '' if value is None else str(float(value)).replace('.', ',')
         else:
-            # Format as-is
-            formatted = str(float(value))
+            def fmtdec(value) -> str:
+                return '' if value is None else fmt(value)
 
-        # Replace decimal separator
-        if client.decimal_separator == ',':
-            formatted = formatted.replace('.', ',')
+            def fmtdec_raw(value) -> str:
+                return '' if value is None else str(float(value))
 
-        return formatted
+        return fmtdec, fmtdec_raw
@@ -1,25 +1,188 @@
 """Somex SQLite Database Repository - Infrastructure Layer"""
 import sqlite3
 import hashlib
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from datetime import datetime
-from pathlib import Path
-from typing import Optional, List, Dict, Any
+from operator import itemgetter
+from typing import Optional, List, Dict, Any, Iterator, Tuple, Sequence
+from src.infrastructure.database.sqlite_connection import open_connection
+
+# Columns of somex_items, in table order
+_ITEM_COLUMNS = (
+    'id', 'codigo_item', 'referencia', 'descripcion', 'id_plan', 'desc_plan',
+    'id_mayor', 'descripcion_plan', 'row_id_item', 'categoria',
+    'created_at', 'updated_at',
+)
+
+# Timestamps are stored as INTEGER microseconds since the epoch (binding an
+# int is cheaper than formatting a datetime). Rows written by older versions
+# still hold ISO TEXT, so read paths render both the same way.
+_TIMESTAMP_COLUMNS = ('created_at', 'updated_at', 'processed_at', 'timestamp')
+
+# Item fields written by the UPSERT, in placeholder order
+_ITEM_PAYLOAD_FIELDS = (
+    'codigo_item', 'referencia', 'descripcion', 'id_plan', 'desc_plan',
+    'id_mayor', 'descripcion_plan', 'row_id_item', 'categoria',
+)
+_get_item_payload = itemgetter(*_ITEM_PAYLOAD_FIELDS)
+
+# SQL statements, kept as constants so the shared connection's statement
+# cache always sees the same text and reuses the prepared statement
+# The WHERE clause skips the write when a re-imported row is unchanged
+_SQL_UPSERT_ITEM = '''INSERT INTO somex_items
+   (codigo_item, referencia, descripcion, id_plan, desc_plan,
+    id_mayor, descripcion_plan, row_id_item, categoria,
+    created_at, updated_at)
+   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+   ON CONFLICT(codigo_item, referencia) DO UPDATE SET
+       descripcion = excluded.descripcion,
+       id_plan = excluded.id_plan,
+       desc_plan = excluded.desc_plan,
+       id_mayor = excluded.id_mayor,
+       descripcion_plan = excluded.descripcion_plan,
+       row_id_item = excluded.row_id_item,
+       categoria = excluded.categoria,
+       updated_at = excluded.updated_at
+   WHERE somex_items.descripcion IS NOT excluded.descripcion
+      OR somex_items.id_plan IS NOT excluded.id_plan
+      OR somex_items.desc_plan IS NOT excluded.desc_plan
+      OR somex_items.id_mayor IS NOT excluded.id_mayor
+      OR somex_items.descripcion_plan IS NOT excluded.descripcion_plan
+      OR somex_items.row_id_item IS NOT excluded.row_id_item
+      OR somex_items.categoria IS NOT excluded.categoria'''
+
+_SQL_MARK_XML = '''INSERT OR IGNORE INTO somex_processed_xml
+   (xml_hash, filename, zip_filename, processed_at, invoice_number, excel_file)
+   VALUES (?, ?, ?, ?, ?, ?)'''
+
+_SQL_INSERT_LOG = '''INSERT INTO somex_processing_logs
+   (timestamp, level, message, xml_filename)
+   VALUES (?, ?, ?, ?)'''
+
+_SQL_IS_PROCESSED = 'SELECT 1 FROM somex_processed_xml WHERE xml_hash = ? LIMIT 1'
+_SQL_ITEM_BY_CODE = 'SELECT * FROM somex_items WHERE codigo_item = ?'
+_SQL_ALL_ITEMS = 'SELECT {columns} FROM somex_items ORDER BY codigo_item'
+_SQL_CLEAR_ITEMS = 'DELETE FROM somex_items'
+_SQL_COUNT_XML = 'SELECT COUNT(*) FROM somex_processed_xml'
+_SQL_COUNT_ITEMS = 'SELECT COUNT(*) FROM somex_items'
+_SQL_COUNT_ERRORS = "SELECT COUNT(*) FROM somex_processing_logs WHERE level = 'ERROR'"
+
+_SQL_PROCESSED_XML_LIST = '''SELECT * FROM somex_processed_xml
+   ORDER BY id DESC
+   LIMIT ?'''
+
+
+def _now_epoch() -> int:
+    """Current time as INTEGER microseconds since the epoch"""
+    return time.time_ns() // 1000
+
+
+def _from_epoch(ts: int) -> datetime:
+    """Convert a microsecond epoch timestamp back to a local datetime"""
+    seconds, micros = divmod(ts, 1_000_000)
+    return datetime.fromtimestamp(seconds).replace(microsecond=micros)
+
+
+def _normalize_timestamps(row: Dict[str, Any]) -> Dict[str, Any]:
+    """Render epoch timestamp columns like the TEXT ones in older rows"""
+    for column in _TIMESTAMP_COLUMNS:
+        value = row.get(column)
+        if isinstance(value, int):
+            row[column] = _from_epoch(value).isoformat(' ')
+    return row
+
+
+def _item_params(item_data: Dict[str, Any], timestamp: int) -> Tuple[Any, ...]:
+    """Build the UPSERT parameters for one item dictionary"""
+    try:
+        # One C-level lookup for the usual case where every field is present
+        payload = _get_item_payload(item_data)
+    except KeyError:
+        payload = tuple(item_data.get(field, '') for field in _ITEM_PAYLOAD_FIELDS)
+    return (*payload, timestamp, timestamp)
 
 
 class SomexRepository:
     """SQLite repository for Somex processing data"""
 
+    # Stored in PRAGMA user_version once the schema below has been created;
+    # bump it whenever _create_schema changes
+    SCHEMA_VERSION = 1
+
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn: Optional[sqlite3.Connection] = None
         self._init_database()
 
-    def _init_database(self) -> None:
-        """Initialize database schema for Somex"""
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
-
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+    def _connect(self) -> sqlite3.Connection:
+        """Return the shared connection, opening it on first use.
+
+        One long-lived connection keeps SQLite's page cache and statement
+        cache warm between calls. It is shared with the processing worker
+        thread, so every use must hold ``self._lock``.
+        """
+        if self._conn is None:
+            self._conn = open_connection(self.db_path)
+        return self._conn
+
+    @contextmanager
+    def _transaction(self, immediate: bool = False) -> Iterator[sqlite3.Cursor]:
+        """Run the block in one transaction on the shared connection
+
+        Args:
+            immediate: Take the write lock up front (BEGIN IMMEDIATE)
+        """
+        with self._lock:
+            cursor = self._connect().cursor()
+            cursor.execute('BEGIN IMMEDIATE' if immediate else 'BEGIN')
+            try:
+                yield cursor
+            except BaseException:
+                cursor.execute('ROLLBACK')
+                raise
+            cursor.execute('COMMIT')
+
+    def close(self) -> None:
+        """Close the shared connection"""
+        with self._lock:
+            if self._conn is not None:
+                # Let SQLite refresh planner statistics if they went stale
+                self._conn.execute('PRAGMA optimize')
+                self._conn.close()
+                self._conn = None
 
+    def _init_database(self) -> None:
+        """Initialize database schema for Somex (skipped when already up to date)"""
+        with self._lock:
+            cursor = self._connect().cursor()
+
+            if self._schema_version(cursor) == self.SCHEMA_VERSION:
+                return
+
+            # WAL is persistent in the database file: readers no longer
+            # block the writer and commits don't fsync the main database
+            # every time
+            cursor.execute('PRAGMA journal_mode=WAL')
+
+            with self._transaction(immediate=True) as cursor:
+                # Another process may have migrated while we waited for the lock
+                if self._schema_version(cursor) != self.SCHEMA_VERSION:
+                    self._create_schema(cursor)
+                    cursor.execute(f'PRAGMA user_version = {int(self.SCHEMA_VERSION)}')
+
+    @staticmethod
+    def _schema_version(cursor: sqlite3.Cursor) -> int:
+        """Schema version stored in the database file"""
+        cursor.execute('PRAGMA user_version')
+        return cursor.fetchone()[0]
+
+    def _create_schema(self, cursor: sqlite3.Cursor) -> None:
+        """Create tables and indexes if they don't exist"""
         # Table for Somex items (for comparison and reference)
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS somex_items (
@@ -63,40 +226,57 @@ class SomexRepository:
             )
         ''')
 
+        # xml_hash is UNIQUE, so SQLite already indexes it; drop the
+        # duplicate index older databases were created with
+        cursor.execute('DROP INDEX IF EXISTS idx_xml_hash')
+
         # Create indexes for better performance
-        cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_xml_hash
-            ON somex_processed_xml(xml_hash)
-        ''')
 
         cursor.execute('''
             CREATE INDEX IF NOT EXISTS idx_item_codigo
             ON somex_items(codigo_item)
         ''')
 
-        conn.commit()
-        conn.close()
+        # Partial index: the stats error count only touches ERROR rows
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_logs_error
+            ON somex_processing_logs(level) WHERE level = 'ERROR'
+        ''')
 
     def get_xml_hash(self, xml_content: bytes) -> str:
         """Generate SHA256 hash of XML content"""
         return hashlib.sha256(xml_content).hexdigest()
 
-    def is_xml_processed(self, xml_content: bytes) -> bool:
-        """Check if XML has been processed based on content hash"""
-        xml_hash = self.get_xml_hash(xml_content)
+    def hash_many(self, contents: Sequence[bytes]) -> List[str]:
+        """
+        Generate SHA256 hashes for several XML contents in parallel
+
+        hashlib releases the GIL while hashing, so threads really run
+        concurrently here.
+
+        Args:
+            contents: XML contents to hash
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        Returns:
+            Hex digests in the same order as contents
+        """
+        if len(contents) < 2:
+            return [self.get_xml_hash(content) for content in contents]
 
-        cursor.execute(
-            'SELECT COUNT(*) FROM somex_processed_xml WHERE xml_hash = ?',
-            (xml_hash,)
-        )
+        workers = min(len(contents), os.cpu_count() or 1)
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            return list(executor.map(self.get_xml_hash, contents))
 
-        count = cursor.fetchone()[0]
-        conn.close()
+    def is_xml_processed(self, xml_content: bytes) -> bool:
+        """Check if XML has been processed based on content hash"""
+        xml_hash = self.get_xml_hash(xml_content)
 
-        return count > 0
+        with self._lock:
+            cursor = self._connect().execute(
+                _SQL_IS_PROCESSED,
+                (xml_hash,)
+            )
+            return cursor.fetchone() is not None
 
     def mark_xml_processed(
         self,
@@ -108,146 +288,113 @@ class SomexRepository:
     ) -> None:
         """Mark XML as processed"""
         xml_hash = self.get_xml_hash(xml_content)
-        timestamp = datetime.now()
+        timestamp = _now_epoch()
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._lock:
+            self._connect().execute(
+                _SQL_MARK_XML,
+                (xml_hash, filename, zip_filename, timestamp, invoice_number, excel_file)
+            )
 
-        cursor.execute(
-            '''INSERT OR IGNORE INTO somex_processed_xml
-               (xml_hash, filename, zip_filename, processed_at, invoice_number, excel_file)
-               VALUES (?, ?, ?, ?, ?, ?)''',
+    def mark_xml_processed_many(
+        self,
+        entries: Sequence[Tuple[bytes, str, Optional[str], Optional[str], Optional[str]]]
+    ) -> None:
+        """
+        Mark several XMLs as processed in one transaction
+
+        Args:
+            entries: (xml_content, filename, zip_filename, invoice_number,
+                excel_file) tuples, as for mark_xml_processed
+        """
+        if not entries:
+            return
+
+        xml_hashes = self.hash_many([entry[0] for entry in entries])
+        timestamp = _now_epoch()
+        params = [
             (xml_hash, filename, zip_filename, timestamp, invoice_number, excel_file)
-        )
+            for xml_hash, (_, filename, zip_filename, invoice_number, excel_file)
+            in zip(xml_hashes, entries)
+        ]
 
-        conn.commit()
-        conn.close()
+        with self._transaction() as cursor:
+            cursor.executemany(_SQL_MARK_XML, params)
 
     def save_item(self, item_data: Dict[str, Any]) -> None:
         """Save or update item information"""
-        timestamp = datetime.now()
-
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            '''INSERT INTO somex_items
-               (codigo_item, referencia, descripcion, id_plan, desc_plan,
-                id_mayor, descripcion_plan, row_id_item, categoria,
-                created_at, updated_at)
-               VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-               ON CONFLICT(codigo_item, referencia) DO UPDATE SET
-                   descripcion = excluded.descripcion,
-                   id_plan = excluded.id_plan,
-                   desc_plan = excluded.desc_plan,
-                   id_mayor = excluded.id_mayor,
-                   descripcion_plan = excluded.descripcion_plan,
-                   row_id_item = excluded.row_id_item,
-                   categoria = excluded.categoria,
-                   updated_at = excluded.updated_at''',
-            (
-                item_data.get('codigo_item', ''),
-                item_data.get('referencia', ''),
-                item_data.get('descripcion', ''),
-                item_data.get('id_plan', ''),
-                item_data.get('desc_plan', ''),
-                item_data.get('id_mayor', ''),
-                item_data.get('descripcion_plan', ''),
-                item_data.get('row_id_item', ''),
-                item_data.get('categoria', ''),
-                timestamp,
-                timestamp
-            )
-        )
+        timestamp = _now_epoch()
 
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._connect().execute(
+                _SQL_UPSERT_ITEM,
+                _item_params(item_data, timestamp)
+            )
 
     def save_items_bulk(self, items: List[Dict[str, Any]]) -> int:
         """Save multiple items in bulk"""
-        timestamp = datetime.now()
-        count = 0
-
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        for item_data in items:
-            cursor.execute(
-                '''INSERT INTO somex_items
-                   (codigo_item, referencia, descripcion, id_plan, desc_plan,
-                    id_mayor, descripcion_plan, row_id_item, categoria,
-                    created_at, updated_at)
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-                   ON CONFLICT(codigo_item, referencia) DO UPDATE SET
-                       descripcion = excluded.descripcion,
-                       id_plan = excluded.id_plan,
-                       desc_plan = excluded.desc_plan,
-                       id_mayor = excluded.id_mayor,
-                       descripcion_plan = excluded.descripcion_plan,
-                       row_id_item = excluded.row_id_item,
-                       categoria = excluded.categoria,
-                       updated_at = excluded.updated_at''',
-                (
-                    item_data.get('codigo_item', ''),
-                    item_data.get('referencia', ''),
-                    item_data.get('descripcion', ''),
-                    item_data.get('id_plan', ''),
-                    item_data.get('desc_plan', ''),
-                    item_data.get('id_mayor', ''),
-                    item_data.get('descripcion_plan', ''),
-                    item_data.get('row_id_item', ''),
-                    item_data.get('categoria', ''),
-                    timestamp,
-                    timestamp
-                )
-            )
-            count += 1
+        timestamp = _now_epoch()
 
-        conn.commit()
-        conn.close()
+        params = [_item_params(item_data, timestamp) for item_data in items]
 
-        return count
+        # One explicit transaction and a single executemany for all rows
+        with self._transaction() as cursor:
+            cursor.executemany(
+                _SQL_UPSERT_ITEM,
+                params
+            )
+
+        return len(params)
 
     def clear_all_items(self) -> None:
         """Clear all items from the database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute('DELETE FROM somex_items')
-
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._connect().execute(_SQL_CLEAR_ITEMS)
 
     def get_item_by_code(self, codigo_item: str) -> Optional[Dict[str, Any]]:
         """Get item information by code"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute(
-            'SELECT * FROM somex_items WHERE codigo_item = ?',
-            (codigo_item,)
-        )
-
-        row = cursor.fetchone()
-        conn.close()
+        with self._lock:
+            cursor = self._connect().execute(
+                _SQL_ITEM_BY_CODE,
+                (codigo_item,)
+            )
+            row = cursor.fetchone()
 
         if row:
-            return dict(row)
+            return _normalize_timestamps(dict(row))
         return None
 
-    def get_all_items(self) -> List[Dict[str, Any]]:
-        """Get all items"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute('SELECT * FROM somex_items ORDER BY codigo_item')
-
-        rows = cursor.fetchall()
-        conn.close()
-
-        return [dict(row) for row in rows]
+    def get_all_items(
+        self,
+        columns: Sequence[str] = _ITEM_COLUMNS
+    ) -> List[Dict[str, Any]]:
+        """
+        Get all items
+
+        Args:
+            columns: somex_items columns to fetch (default: all of them)
+
+        Returns:
+            List of item dictionaries keyed by the requested columns
+        """
+        columns = tuple(columns)
+        unknown = set(columns) - set(_ITEM_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown somex_items columns: {sorted(unknown)}")
+
+        # Read everything under the lock: the connection is shared with the
+        # worker thread, whose writes must not interleave with the read
+        with self._lock:
+            # Plain tuples + zip are cheaper than sqlite3.Row -> dict
+            cursor = self._connect().cursor()
+            cursor.row_factory = None
+            cursor.execute(_SQL_ALL_ITEMS.format(columns=', '.join(columns)))
+            rows = cursor.fetchall()
+
+        items = [dict(zip(columns, row)) for row in rows]
+        if not set(columns).isdisjoint(_TIMESTAMP_COLUMNS):
+            items = [_normalize_timestamps(item) for item in items]
+        return items
 
     def log_processing(
         self,
@@ -256,42 +403,30 @@ class SomexRepository:
         xml_filename: Optional[str] = None
     ) -> None:
         """Log processing event"""
-        timestamp = datetime.now()
-
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            '''INSERT INTO somex_processing_logs
-               (timestamp, level, message, xml_filename)
-               VALUES (?, ?, ?, ?)''',
-            (timestamp, level, message, xml_filename)
-        )
+        timestamp = _now_epoch()
 
-        conn.commit()
-        conn.close()
+        with self._lock:
+            self._connect().execute(
+                _SQL_INSERT_LOG,
+                (timestamp, level, message, xml_filename)
+            )
 
     def get_processing_stats(self) -> Dict[str, int]:
         """Get processing statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Count processed XMLs
-        cursor.execute('SELECT COUNT(*) FROM somex_processed_xml')
-        xml_count = cursor.fetchone()[0]
+        with self._lock:
+            cursor = self._connect().cursor()
 
-        # Count items
-        cursor.execute('SELECT COUNT(*) FROM somex_items')
-        items_count = cursor.fetchone()[0]
+            # Count processed XMLs
+            cursor.execute(_SQL_COUNT_XML)
+            xml_count = cursor.fetchone()[0]
 
-        # Count errors
-        cursor.execute(
-            'SELECT COUNT(*) FROM somex_processing_logs WHERE level = ?',
-            ('ERROR',)
-        )
-        errors_count = cursor.fetchone()[0]
+            # Count items
+            cursor.execute(_SQL_COUNT_ITEMS)
+            items_count = cursor.fetchone()[0]
 
-        conn.close()
+            # Count errors
+            cursor.execute(_SQL_COUNT_ERRORS)
+            errors_count = cursor.fetchone()[0]
 
         return {
             'xml_processed': xml_count,
@@ -301,18 +436,11 @@ class SomexRepository:
 
     def get_processed_xml_list(self, limit: int = 100) -> List[Dict[str, Any]]:
         """Get list of processed XMLs"""
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
-
-        cursor.execute(
-            '''SELECT * FROM somex_processed_xml
-               ORDER BY processed_at DESC
-               LIMIT ?''',
-            (limit,)
-        )
-
-        rows = cursor.fetchall()
-        conn.close()
+        with self._lock:
+            cursor = self._connect().execute(
+                _SQL_PROCESSED_XML_LIST,
+                (limit,)
+            )
+            rows = cursor.fetchall()
 
-        return [dict(row) for row in rows]
+        return [_normalize_timestamps(dict(row)) for row in rows]
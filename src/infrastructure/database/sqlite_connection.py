@@ -0,0 +1,49 @@
+"""SQLite Connection Setup - Infrastructure Layer"""
+import sqlite3
+from pathlib import Path
+
+# Applied to every connection (these settings are not stored in the file)
+CONNECTION_PRAGMAS = (
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA cache_size=-65536',  # 64 MiB
+    'PRAGMA mmap_size=268435456',  # 256 MiB
+    'PRAGMA busy_timeout=5000',
+)
+
+# Size of the per-connection prepared statement LRU cache
+STATEMENT_CACHE_SIZE = 256
+
+
+def open_connection(db_path: str, read_only: bool = False) -> sqlite3.Connection:
+    """Open a connection configured the same way for every repository
+
+    Connections run in autocommit mode (transactions are explicit), return
+    sqlite3.Row rows and may be used from any thread; callers serialize
+    access themselves.
+
+    Args:
+        db_path: Database file path (or ':memory:')
+        read_only: Open the file in read-only mode
+
+    Returns:
+        Configured connection
+    """
+    if read_only:
+        target = Path(db_path).resolve().as_uri() + '?mode=ro'
+    else:
+        if db_path != ':memory:':
+            Path(db_path).parent.mkdir(parents=True, exist_ok=True)
+        target = db_path
+
+    conn = sqlite3.connect(
+        target,
+        uri=read_only,
+        check_same_thread=False,
+        isolation_level=None,
+        cached_statements=STATEMENT_CACHE_SIZE
+    )
+    conn.row_factory = sqlite3.Row
+    for pragma in CONNECTION_PRAGMAS:
+        conn.execute(pragma)
+    return conn
@@ -1,25 +1,265 @@
 """SQLite Database Repository Implementation - Infrastructure Layer"""
+import logging
+import queue
 import sqlite3
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-from pathlib import Path
-from typing import Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from src.domain.repositories.database_repository import DatabaseRepository
+from src.infrastructure.database.sqlite_connection import open_connection
+
+# SQL statements, kept as constants so the shared connection's statement
+# cache always sees the same text and reuses the prepared statement
+_SQL_IS_EMAIL_PROCESSED = 'SELECT 1 FROM processed_emails WHERE email_id = ? LIMIT 1'
+_SQL_MARK_EMAIL = 'INSERT OR IGNORE INTO processed_emails (email_id, processed_at) VALUES (?, ?)'
+
+_SQL_INSERT_INVOICE = '''INSERT INTO processed_invoices
+   (invoice_number, email_id, processed_at, csv_file)
+   VALUES (?, ?, ?, ?)'''
+
+_SQL_INSERT_LOG = 'INSERT INTO processing_logs (timestamp, level, message) VALUES (?, ?, ?)'
+
+# All three counters in one statement (one prepare, one step)
+_SQL_PROCESSING_STATS = '''SELECT
+   (SELECT COUNT(*) FROM processed_emails),
+   (SELECT COUNT(*) FROM processed_invoices),
+   (SELECT COUNT(*) FROM processing_logs WHERE level = 'ERROR')'''
+
+_PRODUCT_FIELDS = ('id', 'codigo', 'descripcion', 'peso', 'um', 'created_at', 'updated_at')
+_PRODUCT_COLUMNS = ', '.join(_PRODUCT_FIELDS)
+_CODIGO_INDEX = _PRODUCT_FIELDS.index('codigo')
+_DESCRIPCION_INDEX = _PRODUCT_FIELDS.index('descripcion')
+
+_SQL_PRODUCT_ID_BY_CODE = 'SELECT id FROM pulgarin_products WHERE codigo = ?'
+
+_SQL_UPSERT_PRODUCT = '''INSERT INTO pulgarin_products
+   (codigo, descripcion, peso, um, created_at, updated_at)
+   VALUES (?, ?, ?, ?, ?, ?)
+   ON CONFLICT(codigo) DO UPDATE SET
+       descripcion = excluded.descripcion,
+       peso = excluded.peso,
+       um = excluded.um,
+       updated_at = excluded.updated_at'''
+
+# RETURNING needs SQLite 3.35+; older bundled builds look the id up instead
+_SQL_UPSERT_PRODUCT_RETURNING = _SQL_UPSERT_PRODUCT + ' RETURNING id'
+_SUPPORTS_RETURNING = sqlite3.sqlite_version_info >= (3, 35, 0)
+
+_SQL_INSERT_PRODUCT = '''INSERT INTO pulgarin_products
+   (codigo, descripcion, peso, um, created_at, updated_at)
+   VALUES (?, ?, ?, ?, ?, ?)'''
+
+_SQL_PRODUCT_BY_CODE = f'''SELECT {_PRODUCT_COLUMNS}
+   FROM pulgarin_products
+   WHERE codigo = ?'''
+
+# One page, newest first; {where} is '' or a keyset 'WHERE id < ?'
+_SQL_PRODUCTS_DESC = f'''SELECT {_PRODUCT_COLUMNS}
+   FROM pulgarin_products {{where}}
+   ORDER BY id DESC LIMIT ? OFFSET ?'''
+
+_SQL_PRODUCTS_UNORDERED = f'SELECT {_PRODUCT_COLUMNS} FROM pulgarin_products'
+
+_SQL_PRODUCTS_BY_ID = f'''SELECT {_PRODUCT_COLUMNS}
+   FROM pulgarin_products
+   ORDER BY id'''
+
+_SQL_PRODUCTS_BY_CODES = f'''SELECT {_PRODUCT_COLUMNS}
+   FROM pulgarin_products
+   WHERE codigo IN ({{placeholders}})
+   ORDER BY id'''
+
+_SQL_DELETE_PRODUCT_BY_ID = 'DELETE FROM pulgarin_products WHERE id = ?'
+_SQL_DELETE_PRODUCT_BY_CODE = 'DELETE FROM pulgarin_products WHERE codigo = ?'
+_SQL_COUNT_PRODUCTS = 'SELECT COUNT(*) FROM pulgarin_products'
+
+# Rows fetched per lock acquisition when iterating over products
+_ITER_BATCH_ROWS = 500
+
+# Read-only connections kept for concurrent readers
+_MAX_READERS = 4
+
+# Seconds to wait for an idle reader when the pool is full before the read
+# falls back to the writer connection
+_READER_WAIT_TIMEOUT = 5.0
+
+
+class _SQLitePool:
+    """One writer connection plus a small pool of read-only connections
+
+    With WAL, readers don't block the writer (or each other), so reads
+    are spread over their own connections instead of queueing behind
+    the writer's lock. Connections are not bound to a thread: the
+    repository is created on the UI thread and used from workers.
+    """
+
+    def __init__(self, db_path: str, max_readers: int = _MAX_READERS):
+        self.db_path = db_path
+        # An in-memory database is private to its connection
+        self._max_readers = 0 if db_path == ':memory:' else max_readers
+
+        self._write_lock = threading.RLock()
+        self._writer: Optional[sqlite3.Connection] = None
+        self._writer_owner: Optional[int] = None
+        self._writer_depth = 0
+
+        self._readers: List[sqlite3.Connection] = []
+        self._readers_lock = threading.Lock()
+        self._idle: "queue.LifoQueue[sqlite3.Connection]" = queue.LifoQueue()
+
+    def _open(self, read_only: bool) -> sqlite3.Connection:
+        """Open a connection with the per-connection PRAGMAs applied"""
+        return open_connection(self.db_path, read_only=read_only)
+
+    @contextmanager
+    def writer(self) -> Iterator[sqlite3.Connection]:
+        """Hold the writer connection (re-entrant within a thread)"""
+        with self._write_lock:
+            if self._writer is None:
+                self._writer = self._open(read_only=False)
+            self._writer_owner = threading.get_ident()
+            self._writer_depth += 1
+            try:
+                yield self._writer
+            finally:
+                self._writer_depth -= 1
+                if not self._writer_depth:
+                    self._writer_owner = None
+
+    @contextmanager
+    def reader(self) -> Iterator[sqlite3.Connection]:
+        """Borrow a read-only connection"""
+        if self._max_readers == 0 or self._writer_owner == threading.get_ident():
+            # Inside a write (e.g. transaction()) reads must see its own
+            # uncommitted changes, so they go through the writer
+            with self.writer() as conn:
+                yield conn
+            return
+
+        conn = self._checkout()
+        if conn is None:
+            # Every reader is busy (e.g. held by a slow caller): don't block
+            # forever, read through the writer instead
+            with self.writer() as conn:
+                yield conn
+            return
+
+        try:
+            yield conn
+        finally:
+            self._idle.put(conn)
+
+    def _checkout(self) -> Optional[sqlite3.Connection]:
+        """Take an idle reader, opening one if the pool isn't full yet
+
+        Returns None if no reader became idle within _READER_WAIT_TIMEOUT.
+        """
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+
+        with self._readers_lock:
+            if len(self._readers) < self._max_readers:
+                conn = self._open(read_only=True)
+                self._readers.append(conn)
+                return conn
+
+        try:
+            return self._idle.get(timeout=_READER_WAIT_TIMEOUT)
+        except queue.Empty:
+            return None
+
+    def close(self) -> None:
+        """Close every connection"""
+        with self._readers_lock:
+            for conn in self._readers:
+                conn.close()
+            self._readers.clear()
+            while not self._idle.empty():
+                self._idle.get_nowait()
+
+        with self._write_lock:
+            if self._writer is not None:
+                self._writer.close()
+                self._writer = None
 
 
 class SQLiteRepository(DatabaseRepository):
     """SQLite implementation of database repository"""
 
+    # Stored in PRAGMA user_version once the schema below has been created;
+    # bump it whenever _create_schema changes
+    SCHEMA_VERSION = 1
+
     def __init__(self, db_path: str):
         self.db_path = db_path
+        self.logger = logging.getLogger(__name__)
+        self._pool = _SQLitePool(db_path)
         self._init_database()
 
-    def _init_database(self) -> None:
-        """Initialize database schema"""
-        Path(self.db_path).parent.mkdir(parents=True, exist_ok=True)
+    @contextmanager
+    def transaction(self) -> Iterator[None]:
+        """Group several repository calls into one transaction (one commit)
+
+        Nested use joins the outer transaction.
+        """
+        with self._pool.writer() as conn:
+            if conn.in_transaction:
+                yield
+                return
+
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                yield
+            except BaseException:
+                conn.execute('ROLLBACK')
+                raise
+            conn.execute('COMMIT')
 
-        conn = sqlite3.connect(self.db_path)
+    @staticmethod
+    def _product_cursor(conn: sqlite3.Connection) -> sqlite3.Cursor:
+        """Cursor returning plain tuples for product queries
+
+        Building the dict with zip() over a tuple is cheaper than converting
+        sqlite3.Row; arraysize makes fetchmany() pull rows in large batches.
+        """
         cursor = conn.cursor()
+        cursor.row_factory = None
+        cursor.arraysize = _ITER_BATCH_ROWS
+        return cursor
+
+    def close(self) -> None:
+        """Close all database connections"""
+        self._pool.close()
+
+    def _init_database(self) -> None:
+        """Initialize database schema (skipped when already up to date)"""
+        with self._pool.writer() as conn:
+            cursor = conn.cursor()
+
+            if self._schema_version(cursor) == self.SCHEMA_VERSION:
+                return
+
+            # WAL is persistent in the database file: readers no longer block
+            # the writer and commits don't fsync the main database every time
+            cursor.execute('PRAGMA journal_mode=WAL')
 
+            with self.transaction():
+                # Another process may have migrated while we waited for the lock
+                if self._schema_version(cursor) != self.SCHEMA_VERSION:
+                    self._create_schema(cursor)
+                    cursor.execute(f'PRAGMA user_version = {int(self.SCHEMA_VERSION)}')
+
+    @staticmethod
+    def _schema_version(cursor: sqlite3.Cursor) -> int:
+        """Schema version stored in the database file"""
+        cursor.execute('PRAGMA user_version')
+        return cursor.fetchone()[0]
+
+    def _create_schema(self, cursor: sqlite3.Cursor) -> None:
+        """Create tables and indexes if they don't exist"""
         # Table for processed emails
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS processed_emails (
@@ -63,90 +303,120 @@ class SQLiteRepository(DatabaseRepository):
             )
         ''')
 
-        # Index for faster lookups by codigo
+        # Unique index on codigo (NULLs allowed) so products can be UPSERTed
+        cursor.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = ?",
+            ('idx_pulgarin_codigo_unique',)
+        )
+        if cursor.fetchone() is None:
+            self._set_aside_duplicate_products(cursor)
+            cursor.execute('''
+                CREATE UNIQUE INDEX idx_pulgarin_codigo_unique
+                ON pulgarin_products(codigo)
+            ''')
+            cursor.execute('DROP INDEX IF EXISTS idx_pulgarin_codigo')
+
+        # Indexes for the stats error count and lookups by email / invoice
         cursor.execute('''
-            CREATE INDEX IF NOT EXISTS idx_pulgarin_codigo
-            ON pulgarin_products(codigo)
+            CREATE INDEX IF NOT EXISTS idx_logs_level
+            ON processing_logs(level)
         ''')
 
-        conn.commit()
-        conn.close()
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_invoices_email
+            ON processed_invoices(email_id)
+        ''')
 
-    def is_email_processed(self, email_id: str) -> bool:
-        """Check if email has been processed"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_invoices_number
+            ON processed_invoices(invoice_number)
+        ''')
 
-        cursor.execute(
-            'SELECT COUNT(*) FROM processed_emails WHERE email_id = ?',
-            (email_id,)
+    def _set_aside_duplicate_products(self, cursor: sqlite3.Cursor) -> None:
+        """Move products that share a codigo out of the way of the unique index
+
+        The oldest row of each codigo (the one lookups returned) is kept. The
+        products tab edits rows by id, so the others may hold different data:
+        they are copied to pulgarin_products_duplicates and logged before
+        being removed, so nothing is lost silently.
+        """
+        duplicates_filter = '''
+            FROM pulgarin_products
+            WHERE codigo IS NOT NULL
+              AND id NOT IN (
+                  SELECT MIN(id) FROM pulgarin_products
+                  WHERE codigo IS NOT NULL
+                  GROUP BY codigo
+              )
+        '''
+
+        cursor.execute(f'SELECT {_PRODUCT_COLUMNS} {duplicates_filter} ORDER BY codigo, id')
+        duplicates = cursor.fetchall()
+        if not duplicates:
+            return
+
+        cursor.execute(f'''
+            CREATE TABLE IF NOT EXISTS pulgarin_products_duplicates AS
+            SELECT {_PRODUCT_COLUMNS} FROM pulgarin_products WHERE 0
+        ''')
+        cursor.execute(f'''
+            INSERT INTO pulgarin_products_duplicates ({_PRODUCT_COLUMNS})
+            SELECT {_PRODUCT_COLUMNS} {duplicates_filter}
+        ''')
+
+        self.logger.warning(
+            f"{len(duplicates)} Pulgarin products share a codigo with an older product; "
+            "they were moved to the pulgarin_products_duplicates table"
         )
+        for row in duplicates:
+            self.logger.warning(
+                f"Duplicate product moved: id={row['id']} codigo={row['codigo']} "
+                f"descripcion={row['descripcion']} peso={row['peso']} um={row['um']}"
+            )
+
+        cursor.execute(f'DELETE {duplicates_filter}')
+
+    def is_email_processed(self, email_id: str) -> bool:
+        """Check if email has been processed"""
+        with self._pool.reader() as conn:
+            cursor = conn.cursor()
 
-        count = cursor.fetchone()[0]
-        conn.close()
+            cursor.execute(_SQL_IS_EMAIL_PROCESSED, (email_id,))
 
-        return count > 0
+            return cursor.fetchone() is not None
 
     def mark_email_processed(self, email_id: str, timestamp: datetime) -> None:
         """Mark email as processed"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            'INSERT OR IGNORE INTO processed_emails (email_id, processed_at) VALUES (?, ?)',
-            (email_id, timestamp)
-        )
+        with self._pool.writer() as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
-        conn.close()
+            cursor.execute(_SQL_MARK_EMAIL, (email_id, timestamp))
 
     def save_invoice_record(self, invoice_number: str, email_id: str,
                            timestamp: datetime, csv_file: str) -> None:
         """Save invoice processing record"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            '''INSERT INTO processed_invoices
-               (invoice_number, email_id, processed_at, csv_file)
-               VALUES (?, ?, ?, ?)''',
-            (invoice_number, email_id, timestamp, csv_file)
-        )
+        with self._pool.writer() as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
-        conn.close()
+            cursor.execute(
+                _SQL_INSERT_INVOICE,
+                (invoice_number, email_id, timestamp, csv_file)
+            )
 
     def log_processing(self, level: str, message: str, timestamp: datetime) -> None:
         """Log processing event to database"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        cursor.execute(
-            'INSERT INTO processing_logs (timestamp, level, message) VALUES (?, ?, ?)',
-            (timestamp, level, message)
-        )
+        with self._pool.writer() as conn:
+            cursor = conn.cursor()
 
-        conn.commit()
-        conn.close()
+            cursor.execute(_SQL_INSERT_LOG, (timestamp, level, message))
 
     def get_processing_stats(self) -> dict:
         """Get processing statistics"""
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
-
-        # Count processed emails
-        cursor.execute('SELECT COUNT(*) FROM processed_emails')
-        emails_count = cursor.fetchone()[0]
+        with self._pool.reader() as conn:
+            cursor = conn.cursor()
 
-        # Count processed invoices
-        cursor.execute('SELECT COUNT(*) FROM processed_invoices')
-        invoices_count = cursor.fetchone()[0]
-
-        # Count errors
-        cursor.execute('SELECT COUNT(*) FROM processing_logs WHERE level = ?', ('ERROR',))
-        errors_count = cursor.fetchone()[0]
-
-        conn.close()
+            cursor.execute(_SQL_PROCESSING_STATS)
+            emails_count, invoices_count, errors_count = cursor.fetchone()
 
         return {
             'emails_processed': emails_count,
@@ -169,48 +439,33 @@ class SQLiteRepository(DatabaseRepository):
         Returns:
             Product ID
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
         now = datetime.now()
 
-        # Check if product exists (by codigo if provided, otherwise always insert)
-        if codigo is not None:
-            cursor.execute(
-                'SELECT id FROM pulgarin_products WHERE codigo = ?',
-                (codigo,)
-            )
-            existing = cursor.fetchone()
+        with self._pool.writer() as conn:
+            cursor = conn.cursor()
 
-            if existing:
-                # Update existing product
+            if codigo is None:
+                # Products without codigo are always new rows
                 cursor.execute(
-                    '''UPDATE pulgarin_products
-                       SET descripcion = ?, peso = ?, um = ?, updated_at = ?
-                       WHERE codigo = ?''',
-                    (descripcion, peso, um, now, codigo)
+                    _SQL_INSERT_PRODUCT,
+                    (None, descripcion, peso, um, now, now)
                 )
-                product_id = existing[0]
+                product_id = cursor.lastrowid
+            elif _SUPPORTS_RETURNING:
+                # Insert or update in one statement, keyed by the unique codigo
+                cursor.execute(
+                    _SQL_UPSERT_PRODUCT_RETURNING,
+                    (codigo, descripcion, peso, um, now, now)
+                )
+                # Drain the statement so the autocommit write completes
+                product_id = cursor.fetchall()[0][0]
             else:
-                # Insert new product
                 cursor.execute(
-                    '''INSERT INTO pulgarin_products
-                       (codigo, descripcion, peso, um, created_at, updated_at)
-                       VALUES (?, ?, ?, ?, ?, ?)''',
+                    _SQL_UPSERT_PRODUCT,
                     (codigo, descripcion, peso, um, now, now)
                 )
-                product_id = cursor.lastrowid
-        else:
-            # Insert new product with NULL codigo
-            cursor.execute(
-                '''INSERT INTO pulgarin_products
-                   (codigo, descripcion, peso, um, created_at, updated_at)
-                   VALUES (?, ?, ?, ?, ?, ?)''',
-                (None, descripcion, peso, um, now, now)
-            )
-            product_id = cursor.lastrowid
-
-        conn.commit()
-        conn.close()
+                cursor.execute(_SQL_PRODUCT_ID_BY_CODE, (codigo,))
+                product_id = cursor.fetchone()[0]
 
         return product_id
 
@@ -223,22 +478,15 @@ class SQLiteRepository(DatabaseRepository):
         Returns:
             Product dictionary or None if not found
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self._pool.reader() as conn:
+            cursor = self._product_cursor(conn)
 
-        cursor.execute(
-            '''SELECT id, codigo, descripcion, peso, um, created_at, updated_at
-               FROM pulgarin_products
-               WHERE codigo = ?''',
-            (codigo,)
-        )
+            cursor.execute(_SQL_PRODUCT_BY_CODE, (codigo,))
 
-        row = cursor.fetchone()
-        conn.close()
+            row = cursor.fetchone()
 
         if row:
-            return dict(row)
+            return dict(zip(_PRODUCT_FIELDS, row))
         return None
 
     def get_all_products(self, limit: Optional[int] = None,
@@ -252,29 +500,64 @@ class SQLiteRepository(DatabaseRepository):
         Returns:
             List of product dictionaries
         """
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        return list(self.iter_products(limit, offset))
 
-        if limit:
-            cursor.execute(
-                '''SELECT id, codigo, descripcion, peso, um, created_at, updated_at
-                   FROM pulgarin_products
-                   ORDER BY id DESC
-                   LIMIT ? OFFSET ?''',
-                (limit, offset)
-            )
-        else:
-            cursor.execute(
-                '''SELECT id, codigo, descripcion, peso, um, created_at, updated_at
-                   FROM pulgarin_products
-                   ORDER BY id DESC'''
-            )
+    def iter_products(self, limit: Optional[int] = None,
+                      offset: int = 0) -> Iterator[dict]:
+        """Iterate over Pulgarin products, newest first, without a full list
 
-        rows = cursor.fetchall()
-        conn.close()
+        Rows are read in pages of _ITER_BATCH_ROWS. Each page borrows a
+        pooled read connection and returns it before any row is yielded, so
+        an iterator that is abandoned or consumed slowly never holds one.
+        Pages after the first continue from the last id seen (keyset
+        pagination) instead of re-skipping rows with OFFSET.
+
+        Args:
+            limit: Maximum number of products to yield (None for all)
+            offset: Number of products to skip (only used with limit)
 
-        return [dict(row) for row in rows]
+        Yields:
+            Product dictionaries
+        """
+        remaining = limit or None
+        skip = offset if limit else 0
+        last_id: Optional[int] = None
+
+        while remaining is None or remaining > 0:
+            page_size = _ITER_BATCH_ROWS
+            if remaining is not None:
+                page_size = min(page_size, remaining)
+            rows = self._product_page(last_id, page_size, skip)
+            if not rows:
+                return
+
+            for row in rows:
+                yield dict(zip(_PRODUCT_FIELDS, row))
+
+            if remaining is not None:
+                remaining -= len(rows)
+            if len(rows) < page_size:
+                return
+            last_id = rows[-1][0]
+            skip = 0
+
+    def _product_page(self, before_id: Optional[int], page_size: int,
+                      skip: int) -> List[tuple]:
+        """Read one page of products, newest first, below before_id"""
+        params: list = []
+        where = ''
+        if before_id is not None:
+            where = 'WHERE id < ?'
+            params.append(before_id)
+        params.extend((page_size, skip))
+
+        with self._pool.reader() as conn:
+            cursor = self._product_cursor(conn)
+            try:
+                cursor.execute(_SQL_PRODUCTS_DESC.format(where=where), params)
+                return cursor.fetchall()
+            finally:
+                cursor.close()
 
     def delete_product(self, product_id: Optional[int] = None,
                       codigo: Optional[str] = None) -> bool:
@@ -290,23 +573,15 @@ class SQLiteRepository(DatabaseRepository):
         if not product_id and not codigo:
             raise ValueError("Must provide either product_id or codigo")
 
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._pool.writer() as conn:
+            cursor = conn.cursor()
 
-        if product_id:
-            cursor.execute(
-                'DELETE FROM pulgarin_products WHERE id = ?',
-                (product_id,)
-            )
-        else:
-            cursor.execute(
-                'DELETE FROM pulgarin_products WHERE codigo = ?',
-                (codigo,)
-            )
+            if product_id:
+                cursor.execute(_SQL_DELETE_PRODUCT_BY_ID, (product_id,))
+            else:
+                cursor.execute(_SQL_DELETE_PRODUCT_BY_CODE, (codigo,))
 
-        deleted = cursor.rowcount > 0
-        conn.commit()
-        conn.close()
+            deleted = cursor.rowcount > 0
 
         return deleted
 
@@ -316,13 +591,12 @@ class SQLiteRepository(DatabaseRepository):
         Returns:
             Total number of products
         """
-        conn = sqlite3.connect(self.db_path)
-        cursor = conn.cursor()
+        with self._pool.reader() as conn:
+            cursor = conn.cursor()
 
-        cursor.execute('SELECT COUNT(*) FROM pulgarin_products')
-        count = cursor.fetchone()[0]
+            cursor.execute(_SQL_COUNT_PRODUCTS)
+            count = cursor.fetchone()[0]
 
-        conn.close()
         return count
 
     @staticmethod
@@ -355,22 +629,18 @@ class SQLiteRepository(DatabaseRepository):
         if not normalized_search:
             return None
 
-        conn = sqlite3.connect(self.db_path)
-        conn.row_factory = sqlite3.Row
-        cursor = conn.cursor()
+        with self._pool.reader() as conn:
+            cursor = self._product_cursor(conn)
 
-        # Get all products and search by normalized description
-        cursor.execute(
-            'SELECT id, codigo, descripcion, peso, um, created_at, updated_at FROM pulgarin_products'
-        )
+            # Get all products and search by normalized description
+            cursor.execute(_SQL_PRODUCTS_UNORDERED)
 
-        rows = cursor.fetchall()
-        conn.close()
+            rows = cursor.fetchall()
 
         # Search for exact match in normalized descriptions
         for row in rows:
-            if self.normalize_text(row['descripcion']) == normalized_search:
-                return dict(row)
+            if self.normalize_text(row[_DESCRIPCION_INDEX]) == normalized_search:
+                return dict(zip(_PRODUCT_FIELDS, row))
 
         return None
 
@@ -393,3 +663,49 @@ class SQLiteRepository(DatabaseRepository):
 
         # Then try by description
         return self.find_product_by_description(descripcion)
+
+    def find_products_bulk(self, codigos: Iterable[str],
+                           descripciones: Iterable[str]) -> Tuple[Dict[str, dict], Dict[str, dict]]:
+        """Find many products at once, for exports that look up every line
+
+        Matching follows find_product_by_code_or_description: exact codigo
+        first, then exact normalized description. When several products
+        share a key the one with the lowest id wins.
+
+        Args:
+            codigos: Product codes to look up
+            descripciones: Product descriptions to look up
+
+        Returns:
+            Tuple of (products by codigo, products by normalized description)
+        """
+        codigos = list({c for c in codigos if c})
+        wanted_descs = {self.normalize_text(d) for d in descripciones}
+        wanted_descs.discard("")
+
+        by_code: Dict[str, dict] = {}
+        by_desc: Dict[str, dict] = {}
+
+        with self._pool.reader() as conn:
+            cursor = self._product_cursor(conn)
+
+            # Query codes in chunks to stay under SQLite's bound-variable limit
+            for start in range(0, len(codigos), 500):
+                chunk = codigos[start:start + 500]
+                placeholders = ','.join('?' * len(chunk))
+                cursor.execute(
+                    _SQL_PRODUCTS_BY_CODES.format(placeholders=placeholders),
+                    chunk
+                )
+                for row in cursor.fetchall():
+                    by_code.setdefault(row[_CODIGO_INDEX], dict(zip(_PRODUCT_FIELDS, row)))
+
+            # Descriptions are matched on normalized text, so scan the table once
+            if wanted_descs:
+                cursor.execute(_SQL_PRODUCTS_BY_ID)
+                for row in cursor:
+                    normalized = self.normalize_text(row[_DESCRIPCION_INDEX])
+                    if normalized in wanted_descs and normalized not in by_desc:
+                        by_desc[normalized] = dict(zip(_PRODUCT_FIELDS, row))
+
+        return by_code, by_desc
@@ -1,9 +1,27 @@
 """IMAP Email Repository Implementation - Infrastructure Layer"""
 import imaplib
-import email
 from email.header import decode_header
-from typing import List, Tuple, Optional
+from email.message import Message
+from functools import lru_cache
+from typing import Dict, List, Tuple, Optional, Union
 from src.domain.repositories.email_repository import EmailRepository
+from src.infrastructure.email.message_parsing import parse_message
+
+# Network-level failures of an IMAP command (ssl.SSLError and socket
+# errors are OSError; IMAP4.abort is an IMAP4.error)
+_IMAP_ERRORS = (imaplib.IMAP4.error, OSError)
+
+
+class IMAPSearchError(RuntimeError):
+    """Searching the mailbox failed"""
+
+
+class IMAPFetchError(RuntimeError):
+    """Fetching one or more messages failed"""
+
+
+class IMAPAttachmentError(RuntimeError):
+    """Extracting attachments from a message failed"""
 
 
 class IMAPEmailRepository(EmailRepository):
@@ -42,17 +60,19 @@ class IMAPEmailRepository(EmailRepository):
                     "   - Cuenta Microsoft: https://account.microsoft.com/security\n"
                     "   - Office 365: https://mysignins.microsoft.com/security-info\n"
                     "3. Ejecuta 'python test_imap.py' para diagnosticar el problema\n"
-                )
+                ) from e
             else:
-                raise ConnectionError(f"IMAP error: {error_msg}")
+                raise ConnectionError(f"IMAP error: {error_msg}") from e
 
         except Exception as e:
+            # Network errors (OSError) and anything else raised while opening
+            # the session, e.g. UnicodeError for non-ASCII credentials
             raise ConnectionError(
-                f"Failed to connect to IMAP server: {str(e)}\n"
+                f"Failed to connect to IMAP server: {e}\n"
                 f"Servidor: {imap_server}:993\n"
                 f"Email: {email_addr}\n"
                 "Ejecuta 'python test_imap.py' para diagnosticar"
-            )
+            ) from e
 
     def search_emails(self, search_criteria: str) -> List[str]:
         """Search emails by criteria"""
@@ -60,66 +80,125 @@ class IMAPEmailRepository(EmailRepository):
             raise ConnectionError("Not connected to IMAP server")
 
         try:
-            # Parse search criteria
             status, messages = self.imap.search(None, search_criteria)
+        except _IMAP_ERRORS as e:
+            raise IMAPSearchError(f"Error searching emails: {e}") from e
 
-            if status != 'OK':
-                return []
+        if status != 'OK':
+            return []
 
-            email_ids = messages[0].split()
-            return [msg_id.decode() for msg_id in email_ids]
+        email_ids = messages[0].split()
+        return [msg_id.decode() for msg_id in email_ids]
 
-        except Exception as e:
-            raise RuntimeError(f"Error searching emails: {str(e)}")
+    def fetch_email(self, email_id: str) -> Tuple[Message, dict]:
+        """Fetch email by ID
 
-    def fetch_email(self, email_id: str) -> Tuple[bytes, dict]:
-        """Fetch email by ID"""
+        Returns the parsed message instead of the raw bytes so that
+        extract_attachments does not have to parse the MIME tree again.
+        """
         if not self.imap:
             raise ConnectionError("Not connected to IMAP server")
 
         try:
             status, msg_data = self.imap.fetch(email_id, '(RFC822)')
+        except _IMAP_ERRORS as e:
+            raise IMAPFetchError(f"Error fetching email {email_id}: {e}") from e
 
-            if status != 'OK':
-                raise RuntimeError(f"Failed to fetch email {email_id}")
+        if status != 'OK' or not isinstance(msg_data[0], tuple):
+            raise IMAPFetchError(f"Failed to fetch email {email_id}")
 
-            email_body = msg_data[0][1]
-            msg = email.message_from_bytes(email_body)
+        msg = parse_message(msg_data[0][1])
+        return msg, self._email_info(msg)
 
-            # Extract basic info
-            email_info = {
-                'subject': self._decode_header(msg['Subject']),
-                'from': self._decode_header(msg['From']),
-                'date': msg['Date']
-            }
+    def fetch_emails(self, email_ids: List[str]) -> Dict[str, Tuple[Message, dict]]:
+        """Fetch several emails with a single FETCH command
 
-            return email_body, email_info
+        One round-trip for the whole message set instead of one per email.
+        Like fetch_email, RFC822 marks the messages as \\Seen.
 
-        except Exception as e:
-            raise RuntimeError(f"Error fetching email {email_id}: {str(e)}")
+        Args:
+            email_ids: Email IDs to fetch
+
+        Returns:
+            Dictionary mapping email ID to (parsed_message, email_info_dict).
+            A message that can't be parsed is left out, so one malformed
+            email doesn't fail the batch; fetch_email reports its error.
+        """
+        if not self.imap:
+            raise ConnectionError("Not connected to IMAP server")
 
-    def extract_attachments(self, email_data: bytes) -> List[Tuple[str, bytes]]:
-        """Extract attachments from email"""
+        if not email_ids:
+            return {}
+
+        try:
+            status, msg_data = self.imap.fetch(','.join(email_ids), '(RFC822)')
+        except _IMAP_ERRORS as e:
+            raise IMAPFetchError(f"Error fetching emails: {e}") from e
+
+        if status != 'OK':
+            raise IMAPFetchError(f"Failed to fetch emails {', '.join(email_ids)}")
+
+        emails = {}
+        for item in msg_data:
+            # Message data comes as (b'<id> (RFC822 {size}', body);
+            # the b')' separators between messages are skipped
+            if not isinstance(item, tuple):
+                continue
+            email_id = item[0].split(None, 1)[0].decode()
+            try:
+                msg = parse_message(item[1])
+                emails[email_id] = (msg, self._email_info(msg))
+            except Exception:
+                # Malformed headers can fail in many places inside the email package
+                continue
+
+        return emails
+
+    def _email_info(self, msg: Message) -> dict:
+        """Extract basic info (subject, sender, date) from a parsed email"""
+        date = msg['Date']
+
+        return {
+            'subject': self._decode_header(msg['Subject']),
+            'from': self._decode_header(msg['From']),
+            'date': str(date) if date is not None else None
+        }
+
+    def extract_attachments(self, email_data: Union[bytes, Message],
+                            extensions: Optional[Tuple[str, ...]] = None) -> List[Tuple[str, bytes]]:
+        """Extract attachments from email (raw bytes or a parsed message)
+
+        Only attachments whose filename ends with one of ``extensions``
+        (case-insensitive) are decoded; the others are skipped without
+        materializing their payload. ``None`` returns every attachment.
+        """
         attachments = []
 
         try:
-            msg = email.message_from_bytes(email_data)
+            msg = parse_message(email_data)
 
             for part in msg.walk():
-                if part.get_content_maintype() == 'multipart':
+                # Parse Content-Disposition once; body and container
+                # parts have none and are skipped here
+                if part.get_content_disposition() not in ('attachment', 'inline'):
                     continue
 
-                if part.get('Content-Disposition') is None:
+                if part.is_multipart():
                     continue
 
                 filename = part.get_filename()
-                if filename:
-                    filename = self._decode_header(filename)
-                    content = part.get_payload(decode=True)
-                    attachments.append((filename, content))
+                if not filename:
+                    continue
+
+                filename = self._decode_header(filename)
+                if extensions and not filename.lower().endswith(extensions):
+                    continue
+
+                attachments.append((filename, part.get_payload(decode=True)))
 
         except Exception as e:
-            raise RuntimeError(f"Error extracting attachments: {str(e)}")
+            # Malformed MIME can fail in many places inside the email package
+            raise IMAPAttachmentError(f"Error extracting attachments: {e}") from e
 
         return attachments
 
@@ -127,9 +206,11 @@ class IMAPEmailRepository(EmailRepository):
         """Disconnect from IMAP server"""
         if self.imap:
             try:
-                self.imap.close()
+                # CLOSE is only valid with a mailbox selected
+                if self.imap.state == 'SELECTED':
+                    self.imap.close()
                 self.imap.logout()
-            except:
+            except _IMAP_ERRORS:
                 pass
             finally:
                 self.imap = None
@@ -139,16 +220,25 @@ class IMAPEmailRepository(EmailRepository):
         if not header_value:
             return ""
 
-        decoded_parts = decode_header(header_value)
-        decoded_string = ""
+        return _decode_header_cached(str(header_value))
 
-        for part, encoding in decoded_parts:
-            if isinstance(part, bytes):
-                try:
-                    decoded_string += part.decode(encoding or 'utf-8')
-                except:
-                    decoded_string += part.decode('utf-8', errors='ignore')
-            else:
-                decoded_string += part
 
-        return decoded_string
+@lru_cache(maxsize=4096)
+def _decode_header_cached(header_value: str) -> str:
+    """Decode an email header, memoized (same senders repeat often)"""
+    # Plain ASCII without RFC 2047 encoded words needs no decoding
+    if header_value.isascii() and '=?' not in header_value:
+        return header_value
+
+    decoded_parts = []
+
+    for part, encoding in decode_header(header_value):
+        if isinstance(part, bytes):
+            try:
+                decoded_parts.append(part.decode(encoding or 'utf-8'))
+            except (LookupError, UnicodeDecodeError):
+                decoded_parts.append(part.decode('utf-8', errors='ignore'))
+        else:
+            decoded_parts.append(part)
+
+    return ''.join(decoded_parts)
@@ -0,0 +1,23 @@
+"""Email Message Parsing - Infrastructure Layer"""
+import email
+from email import policy
+from email.message import Message
+from typing import Union
+
+
+def parse_message(email_data: Union[bytes, Message]) -> Message:
+    """Parse a raw email, passing already-parsed messages through
+
+    Every email repository parses with policy.default, so callers get the
+    same EmailMessage type and header semantics whichever implementation
+    fetched the message.
+
+    Args:
+        email_data: Raw email (or header) bytes, or a parsed message
+
+    Returns:
+        Parsed message
+    """
+    if isinstance(email_data, Message):
+        return email_data
+    return email.message_from_bytes(email_data, policy=policy.default)
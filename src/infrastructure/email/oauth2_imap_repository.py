@@ -13,11 +13,14 @@ OAuth 2.0 Device Code Flow:
 """
 import os
 import imaplib
-import email
 import json
 import logging
+import threading
+import time
 from email.header import decode_header
-from typing import List, Tuple, Optional
+from functools import lru_cache
+from email.message import Message
+from typing import Dict, List, Tuple, Optional, Union
 from pathlib import Path
 import sys
 
@@ -29,7 +32,69 @@ except ImportError:
         "Please install it with: pip install msal>=1.24.0"
     )
 
+# orjson is optional: faster parsing when installed, stdlib json otherwise
+# (orjson.JSONDecodeError subclasses json.JSONDecodeError)
+try:
+    from orjson import loads as _json_loads
+except ImportError:
+    _json_loads = json.loads
+
 from src.domain.repositories.email_repository import EmailRepository
+from src.infrastructure.email.message_parsing import parse_message
+
+
+@lru_cache(maxsize=1)
+def _resolve_azure_credentials(env_client_id: Optional[str], env_tenant_id: str,
+                               config_file: str) -> Tuple[Optional[str], str]:
+    """Resolve Azure AD credentials once per process
+
+    Repository instances are created per processing run; caching skips the
+    config file lookups and JSON parsing on every construction.
+
+    Args:
+        env_client_id: AZURE_CLIENT_ID environment variable
+        env_tenant_id: AZURE_TENANT_ID environment variable
+        config_file: OAuth config file path
+
+    Returns:
+        Tuple of (client_id, tenant_id)
+    """
+    logger = logging.getLogger(__name__)
+    tenant_id = 'common'
+
+    # Priority 1: Environment variables (.env file)
+    if env_client_id:
+        logger.info("Loading Azure credentials from environment variables")
+        return env_client_id, env_tenant_id
+
+    # Priority 2: OAuth config file
+    # Try to find config file (works both in dev and PyInstaller bundle)
+    config_paths = [
+        Path(config_file),  # Development path
+        Path(sys._MEIPASS) / config_file if getattr(sys, 'frozen', False) else None,  # PyInstaller bundle
+    ]
+
+    for config_path in config_paths:
+        if config_path and config_path.exists():
+            try:
+                config = _json_loads(config_path.read_bytes())
+
+                if config.get('enabled', True):
+                    client_id = config.get('azure_client_id')
+                    tenant_id = config.get('azure_tenant_id', 'common')
+
+                    if client_id and client_id != 'TU_AZURE_CLIENT_ID_AQUI':
+                        logger.info(f"Loading Azure credentials from config file: {config_path}")
+                        return client_id, tenant_id
+
+            except json.JSONDecodeError as e:
+                logger.error(f"Error parsing OAuth config file: {e}")
+            except Exception as e:
+                logger.error(f"Error reading OAuth config file: {e}")
+
+    # No credentials found
+    logger.warning("No Azure credentials found in environment or config file")
+    return None, tenant_id
 
 
 class OAuth2IMAPRepository(EmailRepository):
@@ -55,9 +120,24 @@ class OAuth2IMAPRepository(EmailRepository):
     # OAuth config file location
     OAUTH_CONFIG_FILE = "config/oauth_config.json"
 
+    # Pooled connections idle longer than this are discarded (Office 365
+    # drops idle IMAP sessions after ~30 minutes)
+    POOL_IDLE_TIMEOUT = 25 * 60
+
+    # Authenticated connections shared between repository instances:
+    # (imap_server, email_addr) -> (connection, last_used). A connection is
+    # taken out of the pool while in use, so it is never shared by two threads.
+    _pool: Dict[Tuple[str, str], Tuple[imaplib.IMAP4_SSL, float]] = {}
+    _pool_lock = threading.Lock()
+
+    # MSAL application and token cache per (client_id, authority)
+    _msal_apps: Dict[Tuple[str, str], Tuple["msal.PublicClientApplication", "msal.SerializableTokenCache"]] = {}
+    _msal_lock = threading.Lock()
+
     def __init__(self):
         """Initialize OAuth 2.0 IMAP repository"""
         self.imap: Optional[imaplib.IMAP4_SSL] = None
+        self._pool_key: Optional[Tuple[str, str]] = None
         self.logger = logging.getLogger(__name__)
 
         # Load Azure AD credentials
@@ -85,17 +165,27 @@ class OAuth2IMAPRepository(EmailRepository):
         self.logger.info(f"Initializing OAuth 2.0 with CLIENT_ID: {self.client_id[:8]}...")
         self.logger.info(f"Authority: {self.authority}")
 
-        # Ensure token cache directory exists
-        cache_path = Path(self.TOKEN_CACHE_FILE)
-        cache_path.parent.mkdir(parents=True, exist_ok=True)
-
-        # Initialize MSAL application with token cache
-        self.token_cache = self._load_token_cache()
-        self.app = msal.PublicClientApplication(
-            client_id=self.client_id,
-            authority=self.authority,
-            token_cache=self.token_cache
-        )
+        # Initialize MSAL application with token cache, once per
+        # (client_id, authority): instances share the authority metadata
+        # discovery and see each other's refreshed tokens immediately
+        msal_key = (self.client_id, self.authority)
+        with self._msal_lock:
+            shared = self._msal_apps.get(msal_key)
+
+            if shared is None:
+                # Ensure token cache directory exists
+                cache_path = Path(self.TOKEN_CACHE_FILE)
+                cache_path.parent.mkdir(parents=True, exist_ok=True)
+
+                token_cache = self._load_token_cache()
+                app = msal.PublicClientApplication(
+                    client_id=self.client_id,
+                    authority=self.authority,
+                    token_cache=token_cache
+                )
+                shared = self._msal_apps[msal_key] = (app, token_cache)
+
+        self.app, self.token_cache = shared
 
     def _load_azure_credentials(self) -> Tuple[Optional[str], str]:
         """Load Azure AD credentials from config file or environment
@@ -104,49 +194,22 @@ class OAuth2IMAPRepository(EmailRepository):
         1. Environment variables (.env) - for development
         2. OAuth config file (config/oauth_config.json) - for production
 
+        The result is cached per process (see _resolve_azure_credentials).
+
         Returns:
             Tuple of (client_id, tenant_id)
         """
-        client_id = None
-        tenant_id = 'common'
-
-        # Priority 1: Environment variables (.env file)
-        env_client_id = os.getenv('AZURE_CLIENT_ID')
-        env_tenant_id = os.getenv('AZURE_TENANT_ID', 'common')
-
-        if env_client_id:
-            self.logger.info("Loading Azure credentials from environment variables")
-            return env_client_id, env_tenant_id
-
-        # Priority 2: OAuth config file
-        # Try to find config file (works both in dev and PyInstaller bundle)
-        config_paths = [
-            Path(self.OAUTH_CONFIG_FILE),  # Development path
-            Path(sys._MEIPASS) / self.OAUTH_CONFIG_FILE if getattr(sys, 'frozen', False) else None,  # PyInstaller bundle
-        ]
-
-        for config_path in config_paths:
-            if config_path and config_path.exists():
-                try:
-                    with open(config_path, 'r', encoding='utf-8') as f:
-                        config = json.load(f)
-
-                    if config.get('enabled', True):
-                        client_id = config.get('azure_client_id')
-                        tenant_id = config.get('azure_tenant_id', 'common')
+        credentials = _resolve_azure_credentials(
+            os.getenv('AZURE_CLIENT_ID'),
+            os.getenv('AZURE_TENANT_ID', 'common'),
+            self.OAUTH_CONFIG_FILE
+        )
 
-                        if client_id and client_id != 'TU_AZURE_CLIENT_ID_AQUI':
-                            self.logger.info(f"Loading Azure credentials from config file: {config_path}")
-                            return client_id, tenant_id
+        # Don't cache a missing configuration: the user may add it and retry
+        if credentials[0] is None:
+            _resolve_azure_credentials.cache_clear()
 
-                except json.JSONDecodeError as e:
-                    self.logger.error(f"Error parsing OAuth config file: {e}")
-                except Exception as e:
-                    self.logger.error(f"Error reading OAuth config file: {e}")
-
-        # No credentials found
-        self.logger.warning("No Azure credentials found in environment or config file")
-        return None, tenant_id
+        return credentials
 
     def _load_token_cache(self) -> msal.SerializableTokenCache:
         """Load token cache from file if it exists
@@ -162,7 +225,7 @@ class OAuth2IMAPRepository(EmailRepository):
         cache_path = Path(self.TOKEN_CACHE_FILE)
         if cache_path.exists():
             try:
-                cache_data = cache_path.read_text()
+                cache_data = cache_path.read_text(encoding='utf-8')
                 cache.deserialize(cache_data)
                 self.logger.info("OAuth token cache loaded successfully")
             except Exception as e:
@@ -176,13 +239,22 @@ class OAuth2IMAPRepository(EmailRepository):
         This persists tokens across application restarts, eliminating the need
         for users to re-authenticate on every execution.
         """
-        if self.token_cache.has_state_changed:
-            try:
-                cache_path = Path(self.TOKEN_CACHE_FILE)
-                cache_path.write_text(self.token_cache.serialize())
-                self.logger.info("OAuth token cache saved successfully")
-            except Exception as e:
-                self.logger.error(f"Failed to save token cache: {e}")
+        # The cache object is shared between instances (see __init__)
+        with self._msal_lock:
+            if self.token_cache.has_state_changed:
+                try:
+                    cache_path = Path(self.TOKEN_CACHE_FILE)
+                    tmp_path = cache_path.with_suffix('.tmp')
+                    # Write to a sibling and swap it in, so a crash mid-write
+                    # never leaves a truncated cache that forces re-authentication
+                    with open(tmp_path, 'w', encoding='utf-8') as f:
+                        f.write(self.token_cache.serialize())
+                        f.flush()
+                        os.fsync(f.fileno())
+                    os.replace(tmp_path, cache_path)
+                    self.logger.info("OAuth token cache saved successfully")
+                except Exception as e:
+                    self.logger.error(f"Failed to save token cache: {e}")
 
     def _acquire_token_interactive(self, email: str) -> Optional[str]:
         """Acquire access token using Device Code Flow
@@ -281,6 +353,16 @@ class OAuth2IMAPRepository(EmailRepository):
         Raises:
             ConnectionError: If connection or authentication fails
         """
+        # Reuse an authenticated connection left by a previous instance
+        # (skips token acquisition, TLS handshake and XOAUTH2)
+        pool_key = (imap_server, email_addr)
+        pooled = self._checkout_connection(pool_key)
+        if pooled:
+            self.imap = pooled
+            self._pool_key = pool_key
+            self.logger.info(f"Reusing pooled IMAP connection to {imap_server} as {email_addr}")
+            return True
+
         try:
             self.logger.info(f"Connecting to {imap_server} using OAuth 2.0...")
 
@@ -309,8 +391,10 @@ class OAuth2IMAPRepository(EmailRepository):
 
             # Select INBOX
             self.imap.select('INBOX')
+            self._pool_key = pool_key
 
             self.logger.info(f"✓ Successfully connected to {imap_server} as {email_addr}")
+
             return True
 
         except imaplib.IMAP4.error as e:
@@ -369,14 +453,17 @@ class OAuth2IMAPRepository(EmailRepository):
             self.logger.error(f"Error searching emails: {e}")
             raise RuntimeError(f"Error searching emails: {str(e)}")
 
-    def fetch_email(self, email_id: str) -> Tuple[bytes, dict]:
+    def fetch_email(self, email_id: str) -> Tuple[Message, dict]:
         """Fetch email by ID
 
+        The message is parsed once here; hand it to extract_attachments
+        as-is so the MIME tree is not parsed again.
+
         Args:
             email_id: Email ID to fetch
 
         Returns:
-            Tuple of (email_body_bytes, email_info_dict)
+            Tuple of (parsed_message, email_info_dict)
 
         Raises:
             ConnectionError: If not connected to server
@@ -391,27 +478,96 @@ class OAuth2IMAPRepository(EmailRepository):
             if status != 'OK':
                 raise RuntimeError(f"Failed to fetch email {email_id}")
 
-            email_body = msg_data[0][1]
-            msg = email.message_from_bytes(email_body)
-
-            # Extract basic info
-            email_info = {
-                'subject': self._decode_header(msg['Subject']),
-                'from': self._decode_header(msg['From']),
-                'date': msg['Date']
-            }
-
-            return email_body, email_info
+            msg = parse_message(msg_data[0][1])
+            return msg, self._email_info(msg)
 
         except Exception as e:
             self.logger.error(f"Error fetching email {email_id}: {e}")
             raise RuntimeError(f"Error fetching email {email_id}: {str(e)}")
 
-    def extract_attachments(self, email_data: bytes) -> List[Tuple[str, bytes]]:
+    def fetch_emails(self, email_ids: List[str]) -> Dict[str, Tuple[Message, dict]]:
+        """Fetch several emails by ID (see fetch_emails_bulk)"""
+        return self.fetch_emails_bulk(email_ids)
+
+    def fetch_emails_bulk(self, email_ids: List[str],
+                          batch_size: int = 50) -> Dict[str, Tuple[Message, dict]]:
+        """Fetch several emails with one FETCH per batch of message IDs
+
+        Each batch is requested as an IMAP message set ("1,5,9"), so N emails
+        cost N / batch_size round trips instead of N.
+
+        Args:
+            email_ids: Email IDs to fetch
+            batch_size: Maximum IDs per FETCH command
+
+        Returns:
+            Dictionary mapping email ID to (parsed_message, email_info_dict).
+            A message that can't be parsed is logged and left out, so one
+            malformed email doesn't fail the batch.
+
+        Raises:
+            ConnectionError: If not connected to server
+            RuntimeError: If fetch fails
+        """
+        if not self.imap:
+            raise ConnectionError("Not connected to IMAP server")
+
+        emails = {}
+
+        for start in range(0, len(email_ids), batch_size):
+            id_set = ','.join(email_ids[start:start + batch_size])
+
+            try:
+                status, msg_data = self.imap.fetch(id_set, '(RFC822)')
+
+                if status != 'OK':
+                    raise RuntimeError(f"Failed to fetch emails {id_set}")
+
+                # Responses come as (b'<id> (RFC822 {size}', body) tuples
+                # separated by b')' entries
+                for item in msg_data:
+                    if not isinstance(item, tuple):
+                        continue
+                    email_id = item[0].split(None, 1)[0].decode()
+                    try:
+                        msg = parse_message(item[1])
+                        emails[email_id] = (msg, self._email_info(msg))
+                    except Exception as e:
+                        self.logger.warning(f"Skipping email {email_id}, it can't be parsed: {e}")
+
+            except Exception as e:
+                self.logger.error(f"Error fetching emails {id_set}: {e}")
+                raise RuntimeError(f"Error fetching emails {id_set}: {str(e)}")
+
+        self.logger.info(f"Fetched {len(emails)} emails in bulk")
+        return emails
+
+    def _email_info(self, email_data: Union[bytes, Message]) -> dict:
+        """Extract basic info (subject, sender, date) from an email
+
+        Args:
+            email_data: Raw email (or header) bytes, or a parsed message
+
+        Returns:
+            Dictionary with subject, from and date
+        """
+        msg = parse_message(email_data)
+        date = msg['Date']
+
+        return {
+            'subject': self._decode_header(msg['Subject']),
+            'from': self._decode_header(msg['From']),
+            'date': str(date) if date is not None else None
+        }
+
+    def extract_attachments(self, email_data: Union[bytes, Message],
+                            extensions: Optional[Tuple[str, ...]] = None) -> List[Tuple[str, bytes]]:
         """Extract attachments from email
 
         Args:
-            email_data: Raw email data bytes
+            email_data: Parsed message from fetch_email, or raw email bytes
+            extensions: Only decode attachments whose filename ends with one
+                of these (case-insensitive); None returns every attachment
 
         Returns:
             List of tuples (filename, content_bytes)
@@ -422,7 +578,7 @@ class OAuth2IMAPRepository(EmailRepository):
         attachments = []
 
         try:
-            msg = email.message_from_bytes(email_data)
+            msg = parse_message(email_data)
 
             for part in msg.walk():
                 if part.get_content_maintype() == 'multipart':
@@ -434,6 +590,8 @@ class OAuth2IMAPRepository(EmailRepository):
                 filename = part.get_filename()
                 if filename:
                     filename = self._decode_header(filename)
+                    if extensions and not filename.lower().endswith(extensions):
+                        continue
                     content = part.get_payload(decode=True)
                     attachments.append((filename, content))
 
@@ -445,17 +603,96 @@ class OAuth2IMAPRepository(EmailRepository):
 
         return attachments
 
-    def disconnect(self) -> None:
-        """Disconnect from IMAP server"""
-        if self.imap:
-            try:
-                self.imap.close()
-                self.imap.logout()
-                self.logger.info("Disconnected from IMAP server")
-            except:
-                pass
-            finally:
-                self.imap = None
+    def disconnect(self, force: bool = False) -> None:
+        """Release the IMAP connection
+
+        The connection goes back to the pool so the next connect() for the
+        same account can reuse it.
+
+        Args:
+            force: Log out and close the connection instead of pooling it
+        """
+        if not self.imap:
+            return
+
+        imap, self.imap = self.imap, None
+        pool_key, self._pool_key = self._pool_key, None
+
+        if not force and pool_key and imap.state == 'SELECTED':
+            with self._pool_lock:
+                replaced = self._pool.get(pool_key)
+                self._pool[pool_key] = (imap, time.monotonic())
+
+            if replaced and replaced[0] is not imap:
+                self._logout(replaced[0])
+            self.logger.info("IMAP connection returned to pool")
+            return
+
+        self._logout(imap)
+
+    def _checkout_connection(self, pool_key: Tuple[str, str]) -> Optional[imaplib.IMAP4_SSL]:
+        """Take a healthy pooled connection for the given (server, email)
+
+        Args:
+            pool_key: (imap_server, email_addr)
+
+        Returns:
+            Connection ready to use, or None if a new one must be opened
+        """
+        with self._pool_lock:
+            entry = self._pool.pop(pool_key, None)
+
+        if entry is None:
+            return None
+
+        imap, last_used = entry
+        if time.monotonic() - last_used > self.POOL_IDLE_TIMEOUT or not self._healthcheck(imap):
+            self.logger.info("Discarding stale pooled IMAP connection")
+            self._logout(imap)
+            return None
+
+        return imap
+
+    def _healthcheck(self, imap: imaplib.IMAP4_SSL) -> bool:
+        """Check that a connection is still usable with NOOP
+
+        Args:
+            imap: Connection to check
+
+        Returns:
+            True if the server answered, False if the session was dropped
+        """
+        try:
+            status, _ = imap.noop()
+            return status == 'OK'
+        except (imaplib.IMAP4.error, OSError) as e:
+            self.logger.info(f"Pooled IMAP connection is no longer usable: {e}")
+            return False
+
+    @classmethod
+    def close_pool(cls) -> None:
+        """Log out every pooled connection
+
+        Call on application shutdown; pooled connections are otherwise only
+        dropped by the server when they time out.
+        """
+        with cls._pool_lock:
+            entries = list(cls._pool.values())
+            cls._pool.clear()
+
+        for imap, _ in entries:
+            cls._logout(imap)
+
+    @staticmethod
+    def _logout(imap: imaplib.IMAP4_SSL) -> None:
+        """Close the selected mailbox and log out, ignoring network errors"""
+        try:
+            if imap.state == 'SELECTED':
+                imap.close()
+            imap.logout()
+            logging.getLogger(__name__).info("Disconnected from IMAP server")
+        except (imaplib.IMAP4.error, OSError):
+            pass
 
     def _decode_header(self, header_value: str) -> str:
         """Decode email header
@@ -469,16 +706,15 @@ class OAuth2IMAPRepository(EmailRepository):
         if not header_value:
             return ""
 
-        decoded_parts = decode_header(header_value)
-        decoded_string = ""
+        decoded_parts = []
 
-        for part, encoding in decoded_parts:
+        for part, encoding in decode_header(header_value):
             if isinstance(part, bytes):
                 try:
-                    decoded_string += part.decode(encoding or 'utf-8')
-                except:
-                    decoded_string += part.decode('utf-8', errors='ignore')
+                    decoded_parts.append(part.decode(encoding or 'utf-8'))
+                except (LookupError, UnicodeDecodeError):
+                    decoded_parts.append(part.decode('utf-8', errors='ignore'))
             else:
-                decoded_string += part
+                decoded_parts.append(part)
 
-        return decoded_string
+        return ''.join(decoded_parts)
@@ -1,22 +1,74 @@
 """GitHub Update Repository Implementation - Infrastructure Layer"""
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+import hashlib
+import mmap
 import os
+import random
 import sys
 import shutil
-import tempfile
+import threading
 import zipfile
-from pathlib import Path
-from typing import Optional, Tuple
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path, PureWindowsPath
+from typing import Dict, List, Optional, Tuple
 from packaging import version
 from src.domain.repositories.update_repository import UpdateRepository
 
 
+class _JitteredRetry(Retry):
+    """urllib3 Retry with jittered, capped exponential backoff
+
+    Random jitter keeps clients that failed together from retrying in
+    lockstep. Retry-After (429/503) is honored but capped like the backoff,
+    so a server can't stall the app for longer than BACKOFF_CAP seconds.
+    """
+
+    BACKOFF_CAP = 60
+
+    def get_backoff_time(self) -> float:
+        backoff = min(self.BACKOFF_CAP, super().get_backoff_time())
+        return backoff + random.uniform(0, self.backoff_factor)
+
+    def get_retry_after(self, response) -> Optional[float]:
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(self.BACKOFF_CAP, retry_after)
+
+
 class GitHubUpdater(UpdateRepository):
     """GitHub-based update implementation"""
 
+    # Files written concurrently when applying a ZIP update (overlaps the
+    # per-file open/write syscalls; 2 is enough on spinning disks)
+    EXTRACT_WORKERS = 8
+
     def __init__(self, version_file: str = "version.txt"):
         self.version_file = version_file
 
+        # One session for the API call and the asset download: connections
+        # (and TLS sessions) are kept alive and reused
+        self._session = requests.Session()
+        retries = _JitteredRetry(
+            total=3,
+            backoff_factor=0.5,
+            status_forcelist=[429, 500, 502, 503, 504],
+            # Hand the last response back once retries run out so callers
+            # handle it by status code instead of getting a RetryError
+            raise_on_status=False
+        )
+        self._session.mount('https://', HTTPAdapter(
+            pool_connections=4, pool_maxsize=4, max_retries=retries
+        ))
+
+        # Latest release responses by API URL: (ETag, release JSON)
+        self._release_cache: Dict[str, Tuple[str, dict]] = {}
+
+        # SHA-256 published by GitHub for release assets, by download URL
+        self._asset_digests: Dict[str, str] = {}
+
     def get_current_version(self) -> str:
         """Get current application version"""
         try:
@@ -43,12 +95,24 @@ class GitHubUpdater(UpdateRepository):
             # Get latest release from GitHub API
             api_url = f"https://api.github.com/repos/{owner}/{repo}/releases/latest"
 
-            response = requests.get(api_url, timeout=10)
-
-            if response.status_code != 200:
+            # Conditional request: GitHub answers 304 (no body, and it does
+            # not count against the rate limit) if the release is unchanged
+            headers = {'Accept': 'application/vnd.github+json'}
+            cached = self._release_cache.get(api_url)
+            if cached:
+                headers['If-None-Match'] = cached[0]
+
+            response = self._session.get(api_url, headers=headers, timeout=10)
+
+            if response.status_code == 304 and cached:
+                release_data = cached[1]
+            elif response.status_code == 200:
+                release_data = response.json()
+                etag = response.headers.get('ETag')
+                if etag:
+                    self._release_cache[api_url] = (etag, release_data)
+            else:
                 return None
-
-            release_data = response.json()
             latest_version = release_data.get('tag_name', '')
 
             # Remove 'v' prefix if present for comparison
@@ -66,6 +130,11 @@ class GitHubUpdater(UpdateRepository):
                     name = asset.get('name', '').lower()
                     if name.endswith('.exe') or name.endswith('.zip'):
                         download_url = asset.get('browser_download_url')
+
+                        # "sha256:<hex>", verified after the download
+                        digest = asset.get('digest') or ''
+                        if digest.startswith('sha256:'):
+                            self._asset_digests[download_url] = digest[len('sha256:'):].lower()
                         break
 
                 # If no assets, use zipball
@@ -80,26 +149,101 @@ class GitHubUpdater(UpdateRepository):
             raise RuntimeError(f"Error checking for updates: {str(e)}")
 
     def download_update(self, download_url: str, destination: str) -> bool:
-        """Download update file"""
-        try:
-            response = requests.get(download_url, stream=True, timeout=30)
-
-            if response.status_code != 200:
-                return False
+        """Download update file
 
-            # Save to destination
+        The file is written to '<destination>.part' and renamed when complete.
+        If an earlier attempt left a partial file, only the missing tail is
+        requested (Range); If-Range makes the server send the whole file again
+        when the asset changed in the meantime.
+        """
+        try:
             dest_path = Path(destination)
             dest_path.parent.mkdir(parents=True, exist_ok=True)
+            part_path = dest_path.with_name(dest_path.name + '.part')
+            validator_path = dest_path.with_name(dest_path.name + '.part.etag')
+
+            for _ in range(2):
+                status = self._download_to_part(download_url, part_path, validator_path)
+                if status != 416:
+                    break
+                # Partial file is not a prefix of the asset: start over, once
+                # (the second request has no Range header to reject)
+                part_path.unlink(missing_ok=True)
+                validator_path.unlink(missing_ok=True)
+
+            if status not in (200, 206):
+                return False
+
+            if validator_path.exists():
+                validator_path.unlink()
+
+            expected_digest = self._asset_digests.get(download_url)
+            if expected_digest and self._sha256(part_path) != expected_digest:
+                part_path.unlink()
+                raise RuntimeError("SHA-256 of the downloaded file does not match the release")
 
-            with open(dest_path, 'wb') as f:
-                for chunk in response.iter_content(chunk_size=8192):
-                    f.write(chunk)
+            part_path.replace(dest_path)
 
             return True
 
         except Exception as e:
             raise RuntimeError(f"Error downloading update: {str(e)}")
 
+    def _download_to_part(self, download_url: str, part_path: Path,
+                          validator_path: Path) -> int:
+        """Request the asset (or its missing tail) and write it to part_path
+
+        Args:
+            download_url: Asset URL
+            part_path: Partial download file, appended to on a 206
+            validator_path: Stored ETag/Last-Modified used for If-Range
+
+        Returns:
+            HTTP status code; the body is only written for 200 and 206
+        """
+        headers = {}
+        if part_path.exists() and validator_path.exists():
+            headers['Range'] = f"bytes={part_path.stat().st_size}-"
+            headers['If-Range'] = validator_path.read_text().strip()
+
+        with self._session.get(download_url, headers=headers, stream=True, timeout=30) as response:
+            if response.status_code == 206:
+                mode = 'ab'
+            elif response.status_code == 200:
+                mode = 'wb'
+
+                # Validator for resuming this download (weak ETags can't be used)
+                validator = response.headers.get('ETag') or response.headers.get('Last-Modified')
+                if validator and not validator.startswith('W/'):
+                    validator_path.write_text(validator)
+                elif validator_path.exists():
+                    validator_path.unlink()
+            else:
+                return response.status_code
+
+            # Release assets are served uncompressed; only let urllib3
+            # decode the body if the server applied a content encoding
+            if response.headers.get('Content-Encoding'):
+                response.raw.decode_content = True
+
+            # Copy straight from the socket in 1 MiB reads
+            with open(part_path, mode) as f:
+                shutil.copyfileobj(response.raw, f, length=1024 * 1024)
+
+        return response.status_code
+
+    @staticmethod
+    def _sha256(path: Path) -> str:
+        """SHA-256 of a file, hashed in one OpenSSL call over a memory map"""
+        digest = hashlib.sha256()
+
+        with open(path, 'rb') as f:
+            if os.fstat(f.fileno()).st_size:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    digest.update(mapped)
+
+        return digest.hexdigest()
+
     def apply_update(self, update_file: str) -> bool:
         """Apply downloaded update"""
         try:
@@ -120,34 +264,127 @@ class GitHubUpdater(UpdateRepository):
             raise RuntimeError(f"Error applying update: {str(e)}")
 
     def _apply_zip_update(self, zip_path: Path) -> bool:
-        """Apply update from ZIP file"""
+        """Apply update from ZIP file
+
+        Entries are first extracted, several at a time, next to their
+        destination as "<name>.tmp" files. Only once every entry extracted
+        cleanly are the live files swapped in: each one is renamed to
+        "<name>.bak" and its .tmp moved into place. If any step fails the
+        swapped files are restored from their backups and the staged files
+        removed, so a CRC error, a full disk or a locked file never leaves a
+        half-updated install.
+        """
         try:
-            # Create temporary directory
-            temp_dir = Path(tempfile.mkdtemp())
-
-            # Extract ZIP
-            with zipfile.ZipFile(zip_path, 'r') as zf:
-                zf.extractall(temp_dir)
-
             # Find the executable or main files
-            app_dir = Path(sys.argv[0]).parent
-
-            # Copy files from temp to app directory
-            for item in temp_dir.rglob('*'):
-                if item.is_file():
-                    relative_path = item.relative_to(temp_dir)
-                    dest_path = app_dir / relative_path
-                    dest_path.parent.mkdir(parents=True, exist_ok=True)
-                    shutil.copy2(item, dest_path)
+            app_dir = Path(sys.argv[0]).parent.resolve()
 
-            # Clean up
-            shutil.rmtree(temp_dir)
+            with zipfile.ZipFile(zip_path, 'r') as zf:
+                # One entry per destination (the last one wins, like
+                # extractall); normcase folds names that are the same file
+                # on case-insensitive file systems
+                targets: Dict[str, Tuple[zipfile.ZipInfo, Path]] = {}
+                for info in zf.infolist():
+                    if info.is_dir():
+                        continue
+
+                    dest_path = self._zip_entry_target(app_dir, info.filename)
+                    if dest_path is not None:
+                        targets[os.path.normcase(str(dest_path))] = (info, dest_path)
+
+            entries = list(targets.values())
+
+            # ZipFile objects must not be shared between threads: each
+            # worker opens its own
+            local = threading.local()
+            opened = []
+            staged = []
+            lock = threading.Lock()
+
+            def extract(entry: Tuple[zipfile.ZipInfo, Path]) -> None:
+                info, dest_path = entry
+
+                worker_zf = getattr(local, 'zf', None)
+                if worker_zf is None:
+                    worker_zf = local.zf = zipfile.ZipFile(zip_path, 'r')
+                    with lock:
+                        opened.append(worker_zf)
+
+                tmp_path = dest_path.with_name(dest_path.name + '.tmp')
+                dest_path.parent.mkdir(parents=True, exist_ok=True)
+                with lock:
+                    staged.append(tmp_path)
+                # Reading to the end verifies the entry CRC (BadZipFile)
+                with worker_zf.open(info) as src, open(tmp_path, 'wb') as dst:
+                    shutil.copyfileobj(src, dst, length=1024 * 1024)
+
+            try:
+                try:
+                    with ThreadPoolExecutor(max_workers=self.EXTRACT_WORKERS) as executor:
+                        # list() re-raises the first failed entry
+                        list(executor.map(extract, entries))
+                finally:
+                    for worker_zf in opened:
+                        worker_zf.close()
+
+                self._swap_in_staged_files([dest_path for _, dest_path in entries])
+            finally:
+                # Left over only if extraction or the swap failed
+                for tmp_path in staged:
+                    tmp_path.unlink(missing_ok=True)
 
             return True
 
         except Exception as e:
             raise RuntimeError(f"Error applying ZIP update: {str(e)}")
 
+    @staticmethod
+    def _zip_entry_target(app_dir: Path, name: str) -> Optional[Path]:
+        """Destination of a ZIP entry, or None if it would land outside app_dir
+
+        Names are checked with Windows path rules on every platform, so
+        backslash separators, drive letters and UNC prefixes are caught
+        even when the archive was built elsewhere.
+        """
+        entry = PureWindowsPath(name)
+        if entry.drive or entry.root or '..' in entry.parts or not entry.parts:
+            return None
+
+        # resolve() also follows symlinks already inside the app directory
+        dest_path = app_dir.joinpath(*entry.parts).resolve()
+        if app_dir not in dest_path.parents:
+            return None
+        return dest_path
+
+    @staticmethod
+    def _swap_in_staged_files(dest_paths: List[Path]) -> None:
+        """Move each "<name>.tmp" over its live file, restoring all on failure"""
+        # (destination, backup of the live file or None if there was none)
+        swapped: List[Tuple[Path, Optional[Path]]] = []
+        try:
+            for dest_path in dest_paths:
+                backup_path = None
+                if dest_path.exists():
+                    # Renaming also works for files in use (e.g. the running exe)
+                    backup_path = dest_path.with_name(dest_path.name + '.bak')
+                    os.replace(dest_path, backup_path)
+                swapped.append((dest_path, backup_path))
+                os.replace(dest_path.with_name(dest_path.name + '.tmp'), dest_path)
+        except BaseException:
+            for dest_path, backup_path in reversed(swapped):
+                if backup_path is not None:
+                    os.replace(backup_path, dest_path)
+                else:
+                    dest_path.unlink(missing_ok=True)
+            raise
+
+        for _, backup_path in swapped:
+            if backup_path is not None:
+                try:
+                    backup_path.unlink()
+                except OSError:
+                    # Still in use (the running exe); harmless leftover
+                    pass
+
     def _apply_exe_update(self, exe_path: Path) -> bool:
         """Apply update from EXE file"""
         try:
@@ -1,4 +1,5 @@
 """UBL 2.1 XML Parser Implementation - Infrastructure Layer"""
+import threading
 from lxml import etree
 from decimal import Decimal
 from datetime import datetime
@@ -7,6 +8,21 @@ from src.domain.entities.invoice import Invoice
 from src.domain.entities.invoice_item import InvoiceItem
 from src.domain.repositories.xml_parser_repository import XMLParserRepository
 
+# lxml parsers are not thread-safe, so each thread keeps its own instance
+_parser_local = threading.local()
+
+
+def _get_parser() -> etree.XMLParser:
+    """Return the reusable XML parser for the current thread"""
+    parser = getattr(_parser_local, 'parser', None)
+    if parser is None:
+        parser = etree.XMLParser(
+            remove_blank_text=True,
+            resolve_entities=False
+        )
+        _parser_local.parser = parser
+    return parser
+
 
 class UBLXMLParser(XMLParserRepository):
     """UBL 2.1 XML parser for Colombian electronic invoices"""
@@ -37,7 +53,7 @@ class UBLXMLParser(XMLParserRepository):
     def parse_invoice(self, xml_content: bytes) -> Optional[Invoice]:
         """Parse UBL 2.1 XML and return Invoice entity"""
         try:
-            tree = etree.fromstring(xml_content)
+            tree = etree.fromstring(xml_content, _get_parser())
 
             # Check if this is an AttachedDocument wrapper
             # If so, extract the Invoice from the CDATA inside cac:Attachment
@@ -52,7 +68,7 @@ class UBLXMLParser(XMLParserRepository):
                     if invoice_xml.startswith('<![CDATA['):
                         invoice_xml = invoice_xml[9:-3]  # Remove <![CDATA[ and ]]>
                     # Parse the Invoice XML
-                    tree = etree.fromstring(invoice_xml.encode('utf-8'))
+                    tree = etree.fromstring(invoice_xml.encode('utf-8'), _get_parser())
 
             # Extract invoice header information
             invoice_number = self._get_text(tree, './/cbc:ID')
@@ -194,7 +210,7 @@ class UBLXMLParser(XMLParserRepository):
     def validate_xml(self, xml_content: bytes) -> bool:
         """Validate XML structure"""
         try:
-            etree.fromstring(xml_content)
+            etree.fromstring(xml_content, _get_parser())
             return True
         except:
             return False
@@ -108,6 +108,10 @@ class MainWindow(QMainWindow):
         self.client_tabs: Dict[str, ClientTab] = {}
         self.workers: Dict[str, ProcessingWorker] = {}
 
+        # One database repository per client, reused across processing runs
+        # (it keeps its connections open) and closed when the window closes
+        self.db_repos: Dict[str, SQLiteRepository] = {}
+
         # Settings
         self.settings = QSettings('MedellinSAE', 'InvoiceProcessor')
 
@@ -236,9 +240,12 @@ class MainWindow(QMainWindow):
             email_repo = IMAPEmailRepository()
             self.logger.info(f"Using basic authentication for {imap_server}")
 
-        # Create database repository for client
-        db_path = Path("data") / f"{client.id}_processed.db"
-        db_repo = SQLiteRepository(str(db_path))
+        # Get (or create) the database repository for the client
+        db_repo = self.db_repos.get(client.id)
+        if db_repo is None:
+            db_path = Path("data") / f"{client.id}_processed.db"
+            db_repo = SQLiteRepository(str(db_path))
+            self.db_repos[client.id] = db_repo
 
         # Create use case
         use_case = ProcessInvoicesUseCase(
@@ -402,4 +409,12 @@ class MainWindow(QMainWindow):
         for worker in self.workers.values():
             worker.wait()
 
+        # Close the client databases now that no worker is using them
+        for db_repo in self.db_repos.values():
+            db_repo.close()
+        self.db_repos.clear()
+
+        # Log out IMAP connections kept for reuse between runs
+        OAuth2IMAPRepository.close_pool()
+
         event.accept()
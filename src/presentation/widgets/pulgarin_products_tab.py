@@ -132,15 +132,17 @@ class PulgarinProductsTab(QWidget):
 
             # Check if columns exist (case-insensitive)
             df.columns = df.columns.str.strip()
+            # Indexar encabezados en minúsculas una sola vez (gana la primera)
+            columns_by_lower = {}
+            for col in df.columns:
+                columns_by_lower.setdefault(col.lower(), col)
+
             column_mapping = {}
             for req_col in required_columns:
-                found = False
-                for col in df.columns:
-                    if col.lower() == req_col.lower():
-                        column_mapping[col] = req_col
-                        found = True
-                        break
-                if not found and req_col != 'Codigo':  # Codigo puede faltar
+                col = columns_by_lower.get(req_col.lower())
+                if col is not None:
+                    column_mapping[col] = req_col
+                elif req_col != 'Codigo':  # Codigo puede faltar
                     raise ValueError(f"Columna requerida no encontrada: {req_col}")
 
             # Rename columns to standard names
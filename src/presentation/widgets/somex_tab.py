@@ -175,15 +175,17 @@ class ProcessingWorker(QThread):
                     )
                     total_results['excel_file'] = excel_path
 
-                    # Marcar todos los XMLs como procesados
-                    for invoice_data in all_invoices:
-                        self.repository.mark_xml_processed(
+                    # Marcar todos los XMLs como procesados (una sola transacción)
+                    self.repository.mark_xml_processed_many([
+                        (
                             invoice_data['xml_content'],
                             invoice_data['xml_filename'],
                             invoice_data['zip_filename'],
                             invoice_data.get('invoice_number'),
                             excel_path
                         )
+                        for invoice_data in all_invoices
+                    ])
 
                     self.progress_update.emit(
                         f"Excel consolidado creado: {excel_path}"
@@ -849,6 +851,9 @@ class SomexTab(QWidget):
 
             items = self.items_importer.import_items_from_excel(excel_path)
 
+            # El catálogo cambió: descartar búsquedas cacheadas
+            self.processor.invalidate_item_cache()
+
             if not items:
                 QMessageBox.warning(
                     self,
@@ -892,7 +897,9 @@ class SomexTab(QWidget):
     def _on_view_items_clicked(self) -> None:
         """Manejar click en botón Ver Items"""
         try:
-            items = self.repository.get_all_items()
+            items = self.repository.get_all_items(
+                columns=('codigo_item', 'referencia', 'descripcion', 'categoria')
+            )
 
             if not items:
                 QMessageBox.information(
@@ -904,17 +911,23 @@ class SomexTab(QWidget):
                 return
 
             # Mostrar primeros 10 items
-            items_text = f"Items Importados ({len(items)} total)\n"
-            items_text += "=" * 60 + "\n\n"
+            parts = [
+                f"Items Importados ({len(items)} total)\n",
+                "=" * 60 + "\n\n",
+            ]
 
             for i, item in enumerate(items[:10], 1):
-                items_text += f"{i}. Código: {item['codigo_item']}\n"
-                items_text += f"   Referencia: {item['referencia']}\n"
-                items_text += f"   Descripción: {item['descripcion']}\n"
-                items_text += f"   Categoría: {item['categoria']}\n\n"
+                parts.append(
+                    f"{i}. Código: {item['codigo_item']}\n"
+                    f"   Referencia: {item['referencia']}\n"
+                    f"   Descripción: {item['descripcion']}\n"
+                    f"   Categoría: {item['categoria']}\n\n"
+                )
 
             if len(items) > 10:
-                items_text += f"\n... y {len(items) - 10} items más"
+                parts.append(f"\n... y {len(items) - 10} items más")
+
+            items_text = "".join(parts)
 
             QMessageBox.information(
                 self,
@@ -965,8 +978,16 @@ class SomexTab(QWidget):
             self.worker.wait()
 
         # Limpiar processing worker si existe
+        worker_terminated = False
         if self.processing_worker and self.processing_worker.isRunning():
             self.processing_worker.terminate()
             self.processing_worker.wait()
+            worker_terminated = True
+
+        # Cerrar la conexión compartida a la base de datos. Un worker
+        # terminado pudo quedar con el lock del repositorio tomado y close()
+        # se bloquearía; en ese caso la salida del proceso libera la conexión
+        if not worker_terminated:
+            self.repository.close()
 
         event.accept()
@@ -0,0 +1,19 @@
+"""Shared pytest fixtures"""
+from email.message import Message
+
+import pytest
+
+
+@pytest.fixture
+def decoded_parts(monkeypatch):
+    """Record the filename of every part whose payload gets decoded"""
+    decoded = []
+    original = Message.get_payload
+
+    def get_payload(self, i=None, decode=False):
+        if decode:
+            decoded.append(self.get_filename())
+        return original(self, i, decode)
+
+    monkeypatch.setattr(Message, 'get_payload', get_payload)
+    return decoded
@@ -0,0 +1,179 @@
+"""Tests for CSVExporter"""
+import csv
+import io
+import logging
+import random
+import sqlite3
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from src.domain.entities.client import Client
+from src.domain.entities.invoice import Invoice
+from src.domain.entities.invoice_item import InvoiceItem
+from src.infrastructure.csv import csv_exporter
+from src.infrastructure.csv.csv_exporter import CSVExporter
+
+
+def _client(client_id='pulgarin', delimiter=';'):
+    return Client(
+        id=client_id,
+        name=client_id.title(),
+        enabled=True,
+        email_config={},
+        xml_config={},
+        output_config={'csv_delimiter': delimiter, 'decimal_separator': ',',
+                       'decimal_places': 2},
+    )
+
+
+def _invoice(*items):
+    return Invoice(
+        invoice_number='FE-1',
+        invoice_date=date(2024, 1, 15),
+        payment_date=None,
+        seller_nit='900',
+        seller_name='Vendedor',
+        buyer_nit='800',
+        buyer_name='Comprador',
+        municipality='Medellín',
+        items=list(items),
+    )
+
+
+def _item(code='P1', name='Arroz', quantity='10', price='5'):
+    return InvoiceItem(
+        product_name=name,
+        product_code=code,
+        subyacente_code='SPN-1',
+        quantity=Decimal(quantity),
+        unit_of_measure='UN',
+        unit_price=Decimal(price),
+        tax_percentage=Decimal('19'),
+    )
+
+
+def _export(exporter, invoices, client, output_dir):
+    """Export and return the CSV as (header, rows as dicts)"""
+    path = exporter.export_invoices(invoices, client, str(output_dir))
+    with open(path, newline='', encoding='utf-8-sig') as f:
+        rows = list(csv.reader(f, delimiter=client.csv_delimiter))
+    return rows[0], [dict(zip(rows[0], row)) for row in rows[1:]]
+
+
+class FakeProductRepository:
+    """Serves Pulgarin products from memory, or fails like a locked database"""
+
+    def __init__(self, products=None, error=None):
+        self.products = products or {}
+        self.error = error
+
+    def find_products_bulk(self, codigos, descripciones):
+        if self.error:
+            raise self.error
+        return {c: self.products[c] for c in codigos if c in self.products}, {}
+
+
+def test_unavailable_database_exports_without_product_data(tmp_path, caplog):
+    exporter = CSVExporter(db_repo=FakeProductRepository(
+        error=sqlite3.OperationalError('database is locked')))
+
+    with caplog.at_level(logging.WARNING):
+        _, rows = _export(exporter, [_invoice(_item())], _client(), tmp_path)
+
+    assert rows[0]['Peso'] == ''
+    assert rows[0]['Cantidad'] == '10,00'
+    assert 'database is locked' in caplog.text
+
+
+def test_unexpected_lookup_errors_are_not_swallowed(tmp_path):
+    exporter = CSVExporter(db_repo=FakeProductRepository(error=KeyError('peso')))
+
+    with pytest.raises(KeyError):
+        _export(exporter, [_invoice(_item())], _client(), tmp_path)
+
+
+@pytest.mark.parametrize('peso', ['N/A', 'abc', 'NaN', 'sNaN', 'Infinity', '-inf'])
+def test_invalid_peso_keeps_original_quantity(tmp_path, peso):
+    repo = FakeProductRepository({'P1': {'peso': peso, 'um': 'KG'}})
+
+    _, rows = _export(CSVExporter(db_repo=repo), [_invoice(_item())], _client(), tmp_path)
+
+    row = rows[0]
+    assert row['Peso'] == peso
+    assert row['U/M BD'] == 'KG'
+    assert row['Cantidad'] == '10,00'
+    assert row['Precio Unitario'] == '5,00'
+    assert row['Valor Total'] == '50,00'
+
+
+def test_decimal_comma_peso_converts_quantity(tmp_path):
+    repo = FakeProductRepository({'P1': {'peso': '2,5', 'um': 'KG'}})
+
+    _, rows = _export(CSVExporter(db_repo=repo), [_invoice(_item())], _client(), tmp_path)
+
+    row = rows[0]
+    assert row['Peso'] == '2,50'
+    assert row['Cantidad'] == '25,00'
+    assert row['Precio Unitario'] == '2,00'
+    assert row['Cantidad Original'] == '10,00'
+
+
+def _random_field(rng):
+    """A value that often contains characters csv must quote"""
+    kind = rng.random()
+    if kind < 0.1:
+        return None
+    if kind < 0.2:
+        return Decimal(rng.randint(-10**6, 10**6)) / 100
+    if kind < 0.25:
+        return rng.randint(-5, 5)
+    # Mostly plain text, so both the fast path and the csv fallback run
+    alphabet = 'ab ñ;,|\t"\r\n\'' if kind < 0.4 else 'abcñ 0.-'
+    return ''.join(rng.choice(alphabet) for _ in range(rng.randint(0, 4)))
+
+
+def _random_rows(rng, count):
+    rows = []
+    for _ in range(count):
+        shape = rng.random()
+        if shape < 0.05:
+            rows.append([''])
+        elif shape < 0.08:
+            rows.append([None])
+        elif shape < 0.1:
+            rows.append([])
+        else:
+            rows.append([_random_field(rng) for _ in range(rng.randint(1, 6))])
+    return rows
+
+
+@pytest.mark.parametrize('delimiter', [';', ',', '\t', '|', '"'])
+@pytest.mark.parametrize('seed', range(5))
+def test_write_rows_matches_csv_writer(delimiter, seed, monkeypatch):
+    # Small batches so flushes land between quoted and plain rows
+    monkeypatch.setattr(csv_exporter, '_WRITE_BATCH_ROWS', 7)
+    rows = _random_rows(random.Random(seed), 500)
+
+    expected = io.StringIO()
+    csv.writer(expected, delimiter=delimiter).writerows(rows)
+
+    actual = io.StringIO()
+    CSVExporter._write_rows(actual, csv.writer(actual, delimiter=delimiter), rows, delimiter)
+
+    assert actual.getvalue() == expected.getvalue()
+
+
+@pytest.mark.parametrize('row', [
+    [''], [None], [], ['', ''], ['a;b'], ['say "hi"'], ['line\nbreak'],
+    ['cr\r'], ['\r\n'], [' lead', 'trail '], [Decimal('1.50'), 0, None],
+])
+def test_write_rows_edge_cases_match_csv_writer(row):
+    expected = io.StringIO()
+    csv.writer(expected, delimiter=';').writerow(row)
+
+    actual = io.StringIO()
+    CSVExporter._write_rows(actual, csv.writer(actual, delimiter=';'), [row], ';')
+
+    assert actual.getvalue() == expected.getvalue()
@@ -0,0 +1,227 @@
+"""Tests for GitHubUpdater"""
+import io
+import os
+import sys
+import zipfile
+
+import pytest
+
+from src.infrastructure.github import github_updater
+from src.infrastructure.github.github_updater import GitHubUpdater
+
+
+@pytest.fixture
+def app_dir(tmp_path, monkeypatch):
+    directory = tmp_path / 'app'
+    directory.mkdir()
+    monkeypatch.setattr(sys, 'argv', [str(directory / 'MedellinSAE.exe')])
+    return directory
+
+
+def _make_zip(path, entries):
+    with zipfile.ZipFile(path, 'w') as zf:
+        for name, data in entries:
+            zf.writestr(name, data)
+    return path
+
+
+def _files(directory):
+    return sorted(
+        str(path.relative_to(directory)).replace(os.sep, '/')
+        for path in directory.rglob('*') if path.is_file()
+    )
+
+
+def test_apply_zip_update_replaces_files(app_dir, tmp_path):
+    (app_dir / 'config.txt').write_text('old')
+    update = _make_zip(tmp_path / 'update.zip', [('config.txt', 'new'), ('lib/a.bin', 'a')])
+
+    assert GitHubUpdater().apply_update(str(update))
+
+    assert (app_dir / 'config.txt').read_text() == 'new'
+    assert _files(app_dir) == ['config.txt', 'lib/a.bin']
+
+
+def test_duplicate_entries_are_written_once(app_dir, tmp_path):
+    with pytest.warns(UserWarning):
+        update = _make_zip(tmp_path / 'update.zip', [('lib/a.txt', 'first'), ('lib/a.txt', 'second')])
+
+    assert GitHubUpdater().apply_update(str(update))
+
+    # Like extractall, the last entry wins
+    assert (app_dir / 'lib' / 'a.txt').read_text() == 'second'
+    assert _files(app_dir) == ['lib/a.txt']
+
+
+def test_failed_replace_restores_live_files(app_dir, tmp_path, monkeypatch):
+    (app_dir / 'a.txt').write_text('old a')
+    (app_dir / 'b.txt').write_text('old b')
+    update = _make_zip(tmp_path / 'update.zip', [('a.txt', 'new a'), ('b.txt', 'new b'), ('c.txt', 'new c')])
+
+    real_replace = os.replace
+
+    def failing_replace(src, dst):
+        if str(src).endswith('c.txt.tmp'):
+            raise PermissionError('file in use')
+        real_replace(src, dst)
+
+    monkeypatch.setattr(github_updater.os, 'replace', failing_replace)
+
+    with pytest.raises(RuntimeError):
+        GitHubUpdater().apply_update(str(update))
+
+    assert (app_dir / 'a.txt').read_text() == 'old a'
+    assert (app_dir / 'b.txt').read_text() == 'old b'
+    # No new file, staged file or backup is left behind
+    assert _files(app_dir) == ['a.txt', 'b.txt']
+
+
+def test_corrupt_entry_leaves_install_untouched(app_dir, tmp_path):
+    (app_dir / 'a.txt').write_text('old a')
+    update = _make_zip(tmp_path / 'update.zip', [('a.txt', 'new a'), ('b.txt', 'x' * 1000)])
+
+    # Flip a byte of b.txt's stored data so its CRC check fails
+    data = bytearray(update.read_bytes())
+    offset = data.index(b'x' * 1000)
+    data[offset] = ord('y')
+    update.write_bytes(bytes(data))
+
+    with pytest.raises(RuntimeError):
+        GitHubUpdater().apply_update(str(update))
+
+    assert (app_dir / 'a.txt').read_text() == 'old a'
+    assert _files(app_dir) == ['a.txt']
+
+
+@pytest.mark.parametrize('name', [
+    '/etc/passwd',
+    '../escape.txt',
+    'lib/../../escape.txt',
+    '..\\escape.txt',
+    'lib\\..\\..\\escape.txt',
+    'C:/Windows/evil.dll',
+    'C:evil.dll',
+    '\\evil.dll',
+    '\\\\server\\share\\evil.dll',
+])
+def test_zip_entry_target_rejects_unsafe_names(app_dir, name):
+    assert GitHubUpdater._zip_entry_target(app_dir.resolve(), name) is None
+
+
+def test_zip_entry_target_accepts_nested_names(app_dir):
+    root = app_dir.resolve()
+
+    assert GitHubUpdater._zip_entry_target(root, 'lib/a.bin') == root / 'lib' / 'a.bin'
+    assert GitHubUpdater._zip_entry_target(root, 'lib\\b.bin') == root / 'lib' / 'b.bin'
+    assert GitHubUpdater._zip_entry_target(root, 'lib/./c.bin') == root / 'lib' / 'c.bin'
+
+
+def test_unsafe_entries_are_not_extracted(app_dir, tmp_path):
+    update = _make_zip(tmp_path / 'update.zip', [
+        ('/abs.txt', 'x'),
+        ('../escape.txt', 'x'),
+        ('..\\win_escape.txt', 'x'),
+        ('C:/drive.txt', 'x'),
+        ('good.txt', 'ok'),
+    ])
+
+    assert GitHubUpdater().apply_update(str(update))
+
+    assert _files(app_dir) == ['good.txt']
+    assert _files(tmp_path) == ['app/good.txt', 'update.zip']
+
+
+@pytest.mark.skipif(not hasattr(os, 'symlink'), reason='symlinks not supported')
+def test_symlink_out_of_app_dir_is_rejected(app_dir, tmp_path):
+    outside = tmp_path / 'outside'
+    outside.mkdir()
+    try:
+        (app_dir / 'link').symlink_to(outside, target_is_directory=True)
+    except OSError:
+        pytest.skip('cannot create symlinks here')
+
+    assert GitHubUpdater._zip_entry_target(app_dir.resolve(), 'link/evil.txt') is None
+
+
+class _FakeResponse:
+    def __init__(self, status_code, body=b'', headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+        self.raw = io.BytesIO(body)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+
+class _FakeSession:
+    """Answers GETs from a list of responses and records the request headers"""
+
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.requests = []
+
+    def get(self, url, headers=None, stream=False, timeout=None):
+        self.requests.append(dict(headers or {}))
+        return self.responses.pop(0)
+
+
+ASSET = bytes(range(256)) * 64
+
+
+def _updater(responses):
+    updater = GitHubUpdater()
+    updater._session = _FakeSession(responses)
+    return updater
+
+
+def _leave_partial(destination, data, etag='"v1"'):
+    destination.with_name(destination.name + '.part').write_bytes(data)
+    destination.with_name(destination.name + '.part.etag').write_text(etag)
+
+
+def test_download_resumes_with_range(tmp_path):
+    destination = tmp_path / 'update.zip'
+    _leave_partial(destination, ASSET[:1000])
+    updater = _updater([_FakeResponse(206, ASSET[1000:])])
+
+    assert updater.download_update('https://example/asset', str(destination))
+
+    assert updater._session.requests == [{'Range': 'bytes=1000-', 'If-Range': '"v1"'}]
+    assert destination.read_bytes() == ASSET
+    assert _files(tmp_path) == ['update.zip']
+
+
+def test_download_restarts_when_range_is_answered_with_200(tmp_path):
+    destination = tmp_path / 'update.zip'
+    _leave_partial(destination, b'stale bytes')
+    updater = _updater([_FakeResponse(200, ASSET, {'ETag': '"v2"'})])
+
+    assert updater.download_update('https://example/asset', str(destination))
+
+    assert destination.read_bytes() == ASSET
+    assert _files(tmp_path) == ['update.zip']
+
+
+def test_download_retries_once_without_range_after_416(tmp_path):
+    destination = tmp_path / 'update.zip'
+    _leave_partial(destination, ASSET + b'extra')
+    updater = _updater([_FakeResponse(416), _FakeResponse(200, ASSET)])
+
+    assert updater.download_update('https://example/asset', str(destination))
+
+    assert updater._session.requests[1] == {}
+    assert destination.read_bytes() == ASSET
+
+
+def test_download_gives_up_when_416_repeats(tmp_path):
+    destination = tmp_path / 'update.zip'
+    _leave_partial(destination, ASSET)
+    updater = _updater([_FakeResponse(416) for _ in range(5)])
+
+    assert not updater.download_update('https://example/asset', str(destination))
+
+    assert len(updater._session.requests) == 2
+    assert not destination.exists()
@@ -0,0 +1,108 @@
+"""Tests for IMAPEmailRepository"""
+from email.message import EmailMessage
+
+from src.infrastructure.email.imap_email_repository import IMAPEmailRepository
+
+
+GOOD_EMAIL = (
+    b'From: Facturas <facturas@example.com>\r\n'
+    b'Subject: =?utf-8?q?Factura_=C3=B1and=C3=BA?=\r\n'
+    b'Date: Mon, 01 Jan 2024 10:00:00 -0500\r\n'
+    b'\r\n'
+    b'Adjunto factura\r\n'
+)
+
+# policy.default raises IndexError while parsing this From header
+MALFORMED_EMAIL = b'From: <\r\nSubject: Rota\r\n\r\nx\r\n'
+
+
+class FakeIMAP:
+    """Answers FETCH with canned RFC822 responses keyed by message ID"""
+
+    state = 'SELECTED'
+
+    def __init__(self, messages):
+        self.messages = messages
+
+    def fetch(self, id_set, query):
+        data = []
+        for email_id in id_set.split(','):
+            raw = self.messages[email_id]
+            data.append((f'{email_id} (RFC822 {{{len(raw)}}}'.encode(), raw))
+            data.append(b')')
+        return 'OK', data
+
+
+def _repository(messages):
+    repo = IMAPEmailRepository()
+    repo.imap = FakeIMAP(messages)
+    return repo
+
+
+def test_fetch_emails_parses_with_default_policy():
+    repo = _repository({'1': GOOD_EMAIL})
+
+    msg, info = repo.fetch_emails(['1'])['1']
+
+    assert isinstance(msg, EmailMessage)
+    assert info == {
+        'subject': 'Factura ñandú',
+        'from': 'Facturas <facturas@example.com>',
+        'date': 'Mon, 01 Jan 2024 10:00:00 -0500',
+    }
+
+
+def test_malformed_email_does_not_fail_the_batch():
+    repo = _repository({'1': GOOD_EMAIL, '2': MALFORMED_EMAIL, '3': GOOD_EMAIL})
+
+    emails = repo.fetch_emails(['1', '2', '3'])
+
+    assert sorted(emails) == ['1', '3']
+
+
+def build_invoice_email():
+    """Mail with a PDF, a top-level ZIP and a ZIP nested in a forwarded message"""
+    forwarded = EmailMessage()
+    forwarded['Subject'] = 'Fwd: factura'
+    forwarded.set_content('Reenvío')
+    forwarded.add_attachment(b'PK nested', maintype='application',
+                             subtype='zip', filename='anidada.ZIP')
+
+    inner = EmailMessage()
+    inner.set_content('Parte interna')
+    inner.add_attachment(b'PK inner', maintype='application',
+                         subtype='zip', filename='interna.zip')
+
+    msg = EmailMessage()
+    msg['From'] = 'facturas@example.com'
+    msg['Subject'] = 'Factura'
+    msg.set_content('Adjunto factura')
+    msg.add_attachment(b'%PDF-1.4', maintype='application',
+                       subtype='pdf', filename='factura.pdf')
+    msg.add_attachment(b'PK top', maintype='application',
+                       subtype='zip', filename='factura.zip')
+    msg.add_attachment(forwarded)
+    msg.attach(inner)
+    return msg.as_bytes()
+
+
+def test_extract_attachments_only_decodes_requested_extensions(decoded_parts):
+    repo = IMAPEmailRepository()
+
+    attachments = repo.extract_attachments(build_invoice_email(), extensions=('.zip',))
+
+    assert sorted(attachments) == [
+        ('anidada.ZIP', b'PK nested'),
+        ('factura.zip', b'PK top'),
+        ('interna.zip', b'PK inner'),
+    ]
+    assert 'factura.pdf' not in decoded_parts
+
+
+def test_extract_attachments_without_filter_returns_everything():
+    repo = IMAPEmailRepository()
+
+    attachments = repo.extract_attachments(build_invoice_email())
+
+    assert sorted(name for name, _ in attachments) == [
+        'anidada.ZIP', 'factura.pdf', 'factura.zip', 'interna.zip']
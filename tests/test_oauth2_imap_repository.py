@@ -0,0 +1,185 @@
+"""Tests for OAuth2IMAPRepository"""
+import imaplib
+import threading
+from email.message import EmailMessage
+
+import pytest
+
+from src.infrastructure.email import oauth2_imap_repository
+from src.infrastructure.email.oauth2_imap_repository import OAuth2IMAPRepository
+from tests.test_imap_email_repository import (
+    GOOD_EMAIL, MALFORMED_EMAIL, FakeIMAP, build_invoice_email)
+
+
+class FakeMSALApp:
+    def __init__(self, client_id, authority=None, token_cache=None):
+        self.client_id = client_id
+
+
+@pytest.fixture
+def make_repo(tmp_path, monkeypatch):
+    """Build repositories without Azure configuration or network access"""
+    monkeypatch.chdir(tmp_path)
+    monkeypatch.setenv('AZURE_CLIENT_ID', 'test-client-id')
+    monkeypatch.setattr(oauth2_imap_repository.msal, 'PublicClientApplication', FakeMSALApp)
+    monkeypatch.setattr(OAuth2IMAPRepository, '_msal_apps', {})
+    monkeypatch.setattr(OAuth2IMAPRepository, '_pool', {})
+    oauth2_imap_repository._resolve_azure_credentials.cache_clear()
+    return OAuth2IMAPRepository
+
+
+def test_fetch_emails_matches_basic_imap_repository(make_repo):
+    repo = make_repo()
+    repo.imap = FakeIMAP({'1': GOOD_EMAIL, '2': MALFORMED_EMAIL})
+
+    emails = repo.fetch_emails(['1', '2'])
+
+    assert sorted(emails) == ['1']
+    msg, info = emails['1']
+    assert isinstance(msg, EmailMessage)
+    assert info == {
+        'subject': 'Factura ñandú',
+        'from': 'Facturas <facturas@example.com>',
+        'date': 'Mon, 01 Jan 2024 10:00:00 -0500',
+    }
+
+
+def test_extract_attachments_only_decodes_requested_extensions(make_repo, decoded_parts):
+    repo = make_repo()
+
+    attachments = repo.extract_attachments(build_invoice_email(), extensions=('.zip',))
+
+    assert sorted(name for name, _ in attachments) == [
+        'anidada.ZIP', 'factura.zip', 'interna.zip']
+    assert 'factura.pdf' not in decoded_parts
+
+
+class FakeIMAPConnection:
+    """Authenticated IMAP4_SSL stand-in that records its lifecycle"""
+
+    opened = []
+
+    def __init__(self, host, port):
+        self.host = host
+        self.state = 'NONAUTH'
+        self.noop_result = 'OK'
+        self.logged_out = False
+        FakeIMAPConnection.opened.append(self)
+
+    def authenticate(self, mechanism, authobject):
+        self.state = 'AUTH'
+
+    def select(self, mailbox):
+        self.state = 'SELECTED'
+
+    def noop(self):
+        if isinstance(self.noop_result, Exception):
+            raise self.noop_result
+        return self.noop_result, [b'']
+
+    def close(self):
+        self.state = 'AUTH'
+
+    def logout(self):
+        self.logged_out = True
+        self.state = 'LOGOUT'
+
+
+@pytest.fixture
+def pooled_repo(make_repo, monkeypatch):
+    """Repositories that open fake connections without a browser login"""
+    FakeIMAPConnection.opened = []
+    monkeypatch.setattr(oauth2_imap_repository.imaplib, 'IMAP4_SSL', FakeIMAPConnection)
+    monkeypatch.setattr(OAuth2IMAPRepository, '_acquire_token_interactive',
+                        lambda self, email: 'token')
+
+    def connected():
+        repo = make_repo()
+        assert repo.connect('user@example.com', '', 'outlook.office365.com')
+        return repo
+
+    return connected
+
+
+def test_disconnect_returns_connection_for_reuse(pooled_repo):
+    first = pooled_repo()
+    imap = first.imap
+    first.disconnect()
+
+    second = pooled_repo()
+
+    assert second.imap is imap
+    assert not imap.logged_out
+    assert len(FakeIMAPConnection.opened) == 1
+
+
+def test_idle_connection_is_evicted(pooled_repo, monkeypatch):
+    first = pooled_repo()
+    stale = first.imap
+    first.disconnect()
+    monkeypatch.setattr(OAuth2IMAPRepository, 'POOL_IDLE_TIMEOUT', -1)
+
+    second = pooled_repo()
+
+    assert second.imap is not stale
+    assert stale.logged_out
+    assert len(FakeIMAPConnection.opened) == 2
+
+
+@pytest.mark.parametrize('noop_result', ['NO', OSError('connection reset'),
+                                         imaplib.IMAP4.abort('socket error')])
+def test_connection_failing_noop_is_replaced(pooled_repo, noop_result):
+    first = pooled_repo()
+    dropped = first.imap
+    first.disconnect()
+    dropped.noop_result = noop_result
+
+    second = pooled_repo()
+
+    assert second.imap is not dropped
+    assert dropped.logged_out
+    assert not OAuth2IMAPRepository._pool
+
+
+def test_pooled_connection_goes_to_one_of_two_concurrent_connects(pooled_repo):
+    first = pooled_repo()
+    pooled = first.imap
+    first.disconnect()
+
+    barrier = threading.Barrier(2)
+    repos = []
+
+    def connect():
+        barrier.wait()
+        repos.append(pooled_repo())
+
+    threads = [threading.Thread(target=connect) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    connections = [repo.imap for repo in repos]
+    assert connections.count(pooled) == 1
+    assert len(FakeIMAPConnection.opened) == 2
+
+    # Only one connection per account stays pooled; the other is logged out
+    for repo in repos:
+        repo.disconnect()
+    assert len(OAuth2IMAPRepository._pool) == 1
+    assert sum(imap.logged_out for imap in connections) == 1
+
+
+def test_forced_disconnect_and_close_pool_log_out(pooled_repo):
+    forced = pooled_repo()
+    forced_imap = forced.imap
+    forced.disconnect(force=True)
+    pooled = pooled_repo()
+    pooled_imap = pooled.imap
+    pooled.disconnect()
+
+    OAuth2IMAPRepository.close_pool()
+
+    assert forced_imap.logged_out
+    assert pooled_imap.logged_out
+    assert not OAuth2IMAPRepository._pool
@@ -0,0 +1,181 @@
+"""Tests for ProcessInvoicesUseCase batch prefetching"""
+import io
+import logging
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+
+from src.domain.entities.client import Client
+from src.domain.use_cases import process_invoices_use_case
+from src.domain.use_cases.process_invoices_use_case import ProcessInvoicesUseCase
+
+
+def _zip_with_xml(name):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w') as zf:
+        zf.writestr(f'{name}.xml', f'<Invoice>{name}</Invoice>')
+    return buffer.getvalue()
+
+
+class FakeEmailRepository:
+    """Mailbox where every email carries one ZIP named after its ID"""
+
+    def __init__(self, email_ids, failing_batches=(), failing_emails=(),
+                 interrupt_fetch=None, interrupt_extract=None):
+        self.email_ids = email_ids
+        self.failing_batches = failing_batches
+        self.failing_emails = failing_emails
+        self.interrupt_fetch = interrupt_fetch
+        self.interrupt_extract = interrupt_extract
+        self.batches = []
+        self.single_fetches = []
+        self.disconnected = False
+
+    def connect(self, email_addr, password, imap_server):
+        return True
+
+    def search_emails(self, search_criteria):
+        return list(self.email_ids)
+
+    def fetch_emails(self, email_ids):
+        self.batches.append(list(email_ids))
+        if self.interrupt_fetch in email_ids:
+            raise KeyboardInterrupt
+        if any(email_id in self.failing_batches for email_id in email_ids):
+            raise ConnectionError('FETCH failed')
+        # Emails that fail on their own are left out of the batch result
+        return {email_id: (email_id, {}) for email_id in email_ids
+                if email_id not in self.failing_emails}
+
+    def fetch_email(self, email_id):
+        self.single_fetches.append(email_id)
+        if email_id in self.failing_emails:
+            raise ValueError(f'cannot fetch {email_id}')
+        return email_id, {}
+
+    def extract_attachments(self, email_data, extensions=None):
+        if email_data == self.interrupt_extract:
+            raise KeyboardInterrupt
+        return [(f'{email_data}.zip', _zip_with_xml(email_data))]
+
+    def disconnect(self):
+        self.disconnected = True
+
+
+class FakeXMLParser:
+    def parse_invoice(self, xml_content):
+        return xml_content.decode()
+
+
+class FakeDatabase:
+    def __init__(self, processed=()):
+        self.processed = set(processed)
+
+    def is_email_processed(self, email_id):
+        return email_id in self.processed
+
+    def mark_email_processed(self, email_id, processed_at):
+        self.processed.add(email_id)
+
+
+class FakeCSVExporter:
+    def __init__(self):
+        self.exported = None
+
+    def export_invoices(self, invoices, client, output_path):
+        self.exported = list(invoices)
+        return f'{output_path}/out.csv'
+
+
+class RecordingExecutor(ThreadPoolExecutor):
+    """ThreadPoolExecutor that remembers every instance it shut down"""
+
+    shut_down = []
+
+    def shutdown(self, *args, **kwargs):
+        super().shutdown(*args, **kwargs)
+        RecordingExecutor.shut_down.append(self)
+
+
+@pytest.fixture(autouse=True)
+def recording_executor(monkeypatch):
+    monkeypatch.setattr(process_invoices_use_case, 'ThreadPoolExecutor', RecordingExecutor)
+    monkeypatch.setattr(ProcessInvoicesUseCase, 'FETCH_BATCH_SIZE', 2)
+    RecordingExecutor.shut_down = []
+    return RecordingExecutor.shut_down
+
+
+def _client():
+    return Client(id='test', name='Test', enabled=True, email_config={},
+                  xml_config={}, output_config={})
+
+
+def _run(email_repo, database=None):
+    database = database or FakeDatabase()
+    csv_repo = FakeCSVExporter()
+    use_case = ProcessInvoicesUseCase(email_repo, FakeXMLParser(), database,
+                                      csv_repo, logging.getLogger('test'))
+    result = use_case.execute(_client(), 'user@example.com', 'secret', '/out')
+    return result, database, csv_repo
+
+
+def _invoice(email_id):
+    return f'<Invoice>{email_id}</Invoice>'
+
+
+def test_batches_are_fetched_in_order_and_skip_processed_emails(recording_executor):
+    repo = FakeEmailRepository(['1', '2', '3', '4', '5'])
+
+    result, database, csv_repo = _run(repo, FakeDatabase(processed={'2'}))
+
+    assert repo.batches == [['1', '3'], ['4', '5']]
+    assert csv_repo.exported == [_invoice(i) for i in ('1', '3', '4', '5')]
+    assert database.processed == {'1', '2', '3', '4', '5'}
+    assert result.emails_processed == 4
+    assert result.success
+    assert repo.disconnected
+    assert len(recording_executor) == 1
+
+
+def test_failed_batch_falls_back_to_single_fetches():
+    repo = FakeEmailRepository(['1', '2', '3', '4'], failing_batches={'3'})
+
+    result, _, csv_repo = _run(repo)
+
+    assert repo.single_fetches == ['3', '4']
+    assert csv_repo.exported == [_invoice(i) for i in ('1', '2', '3', '4')]
+    assert result.success
+
+
+def test_failed_email_is_reported_and_not_marked_processed():
+    repo = FakeEmailRepository(['1', '2', '3'], failing_emails={'2'})
+
+    result, database, csv_repo = _run(repo)
+
+    assert repo.single_fetches == ['2']
+    assert csv_repo.exported == [_invoice('1'), _invoice('3')]
+    assert database.processed == {'1', '3'}
+    assert result.errors_count == 1
+    assert 'Error processing email 2: cannot fetch 2' in result.error_messages[0]
+
+
+def test_interrupted_processing_stops_prefetching(recording_executor):
+    repo = FakeEmailRepository(['1', '2', '3', '4', '5', '6'], interrupt_extract='1')
+
+    with pytest.raises(KeyboardInterrupt):
+        _run(repo)
+
+    # Only the batch already prefetched was downloaded
+    assert repo.batches == [['1', '2'], ['3', '4']]
+    assert len(recording_executor) == 1
+
+
+def test_interrupted_fetch_shuts_the_prefetcher_down(recording_executor):
+    repo = FakeEmailRepository(['1', '2', '3', '4', '5', '6'], interrupt_fetch='3')
+
+    with pytest.raises(KeyboardInterrupt):
+        _run(repo)
+
+    assert repo.batches == [['1', '2'], ['3', '4']]
+    assert len(recording_executor) == 1
@@ -0,0 +1,165 @@
+"""Tests for SomexProcessorService invoice parsing"""
+import logging
+from decimal import Decimal
+
+import pytest
+
+from src.application.services.somex_processor_service import SomexProcessorService
+from src.infrastructure.database.somex_repository import SomexRepository
+
+NAMESPACES = (
+    'xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2" '
+    'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2"'
+)
+
+
+def _line(code, note, quantity, taxable, percent='19'):
+    return f"""
+  <cac:InvoiceLine>
+    <cbc:ID>{code}</cbc:ID>
+    <cbc:Note>{note}</cbc:Note>
+    <cbc:InvoicedQuantity unitCode="NIU">{quantity}</cbc:InvoicedQuantity>
+    <cac:TaxTotal>
+      <cac:TaxSubtotal>
+        <cbc:TaxableAmount>{taxable}</cbc:TaxableAmount>
+        <cac:TaxCategory><cbc:Percent>{percent}</cbc:Percent></cac:TaxCategory>
+      </cac:TaxSubtotal>
+    </cac:TaxTotal>
+    <cac:Item>
+      <cbc:Description>Descripción {code}</cbc:Description>
+      <cac:StandardItemIdentification><cbc:ID>{code}</cbc:ID></cac:StandardItemIdentification>
+    </cac:Item>
+  </cac:InvoiceLine>"""
+
+
+def _invoice(header, lines):
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<Invoice xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2" {NAMESPACES}>
+  {header}
+  {''.join(lines)}
+</Invoice>"""
+
+
+RECEIVER = """
+  <cac:ReceiverParty>
+    <cac:PartyTaxScheme>
+      <cbc:RegistrationName>Granja El Roble</cbc:RegistrationName>
+      <cbc:CompanyID>811000111</cbc:CompanyID>
+      <cac:RegistrationAddress><cbc:CityName>Rionegro</cbc:CityName></cac:RegistrationAddress>
+    </cac:PartyTaxScheme>
+  </cac:ReceiverParty>"""
+
+HEADER = f"""
+  <cbc:ID>SETP990001</cbc:ID>
+  <cbc:IssueDate>2024-05-02</cbc:IssueDate>
+  <cbc:DueDate>2024-06-30</cbc:DueDate>
+  <cac:OrderReference><cbc:ID>2B286170</cbc:ID></cac:OrderReference>
+  <cac:PaymentMeans><cbc:PaymentDueDate>2024-06-01</cbc:PaymentDueDate></cac:PaymentMeans>
+  {RECEIVER}"""
+
+
+@pytest.fixture
+def repository(tmp_path):
+    repo = SomexRepository(str(tmp_path / 'somex.db'))
+    yield repo
+    repo.close()
+
+
+@pytest.fixture
+def service(repository, tmp_path):
+    return SomexProcessorService(repository, logging.getLogger('test'),
+                                 output_dir=str(tmp_path / 'out'))
+
+
+def test_parse_invoice_xml_header_fields(service):
+    xml = _invoice(HEADER, [_line('100', 'SAL X 40 KILOS', '2', '80000')])
+
+    invoice = service.parse_invoice_xml(xml.encode('utf-8'))
+
+    assert invoice['invoice_number'] == '2B-286170'
+    assert invoice['invoice_date'] == '2024-05-02'
+    assert invoice['payment_date'] == '2024-06-01'
+    assert invoice['buyer_nit'] == '811000111'
+    assert invoice['buyer_name'] == 'Granja El Roble'
+    assert invoice['municipality'] == 'Rionegro'
+    assert invoice['seller_nit'] == '800221724'
+
+
+def test_header_fields_ignore_invoice_lines(service):
+    # No OrderReference and no payment dates in the header: values inside
+    # the lines must not be picked up instead
+    line = _line('100', 'SAL', '1', '100').replace(
+        '<cbc:Note>', '<cbc:DueDate>2030-01-01</cbc:DueDate><cbc:Note>')
+    xml = _invoice('<cbc:IssueDate>2024-05-02</cbc:IssueDate>', [line])
+
+    invoice = service.parse_invoice_xml(xml.encode('utf-8'))
+
+    assert invoice['invoice_number'] == ''
+    assert invoice['payment_date'] == ''
+
+
+def test_due_date_is_used_without_payment_due_date(service):
+    header = HEADER.replace(
+        '<cac:PaymentMeans><cbc:PaymentDueDate>2024-06-01</cbc:PaymentDueDate></cac:PaymentMeans>', '')
+
+    invoice = service.parse_invoice_xml(_invoice(header, []).encode('utf-8'))
+
+    assert invoice['payment_date'] == '2024-06-30'
+    assert invoice['items'] == []
+
+
+def test_line_quantities_use_catalog_kilos_first(service, repository):
+    repository.save_item({'codigo_item': '100', 'referencia': 'R',
+                          'descripcion': 'SAL SOMEX CEBA X 40 KILOS'})
+    xml = _invoice(HEADER, [
+        _line('100', 'SAL X 25 KILOS', '2', '80000'),   # catalog wins: 40 kg
+        _line('200', 'MAIZ X 12.5 KILOS', '4', '10000', percent='5'),  # from the name
+        _line('300', 'PREMEZCLA', '3', '9000'),          # no kilos anywhere
+    ])
+
+    first, second, third = service.parse_invoice_xml(xml.encode('utf-8'))['items']
+
+    assert first['quantity_original'] == Decimal('2')
+    assert first['quantity_adjusted'] == Decimal('80')
+    assert first['unit_price'] == Decimal('1000')
+    assert first['tax_amount'] == Decimal('15200')
+    assert first['line_total'] == Decimal('95200')
+
+    assert second['quantity_adjusted'] == Decimal('50.0')
+    assert second['unit_price'] == Decimal('200')
+    assert second['tax_percentage'] == Decimal('5')
+
+    assert third['quantity_adjusted'] == Decimal('3')
+    assert third['unit_price'] == Decimal('3000')
+    assert {item['unit_of_measure'] for item in (first, second, third)} == {'KG'}
+
+
+def test_attached_document_overrides_number_and_buyer(service):
+    embedded = _invoice(HEADER, [_line('100', 'SAL X 40 KILOS', '1', '100')])
+    wrapper = f"""<?xml version="1.0" encoding="UTF-8"?>
+<AttachedDocument xmlns="urn:oasis:names:specification:ubl:schema:xsd:AttachedDocument-2" {NAMESPACES}>
+  <cbc:ID>3C123</cbc:ID>
+  <cac:ReceiverParty>
+    <cac:PartyTaxScheme>
+      <cbc:RegistrationName>Cliente Adjunto</cbc:RegistrationName>
+      <cbc:CompanyID>900555</cbc:CompanyID>
+    </cac:PartyTaxScheme>
+  </cac:ReceiverParty>
+  <cac:Attachment>
+    <cac:ExternalReference>
+      <cbc:Description><![CDATA[{embedded}]]></cbc:Description>
+    </cac:ExternalReference>
+  </cac:Attachment>
+</AttachedDocument>"""
+
+    invoice = service.parse_invoice_xml(wrapper.encode('utf-8'))
+
+    assert invoice['invoice_number'] == '3C-123'
+    assert invoice['buyer_nit'] == '900555'
+    assert invoice['buyer_name'] == 'Cliente Adjunto'
+    assert invoice['municipality'] == 'Rionegro'
+    assert len(invoice['items']) == 1
+
+
+def test_unparseable_xml_returns_none(service):
+    assert service.parse_invoice_xml(b'<Invoice><cbc:ID>') is None
@@ -0,0 +1,166 @@
+"""Tests for SomexRepository"""
+import sqlite3
+from datetime import datetime
+
+import pytest
+
+from src.infrastructure.database import somex_repository
+from src.infrastructure.database.somex_repository import SomexRepository
+
+
+@pytest.fixture
+def db_path(tmp_path):
+    return str(tmp_path / 'somex.db')
+
+
+@pytest.fixture
+def repo(db_path):
+    repository = SomexRepository(db_path)
+    yield repository
+    repository.close()
+
+
+def test_is_xml_processed_sees_other_instances(repo, db_path):
+    other = SomexRepository(db_path)
+    try:
+        assert not repo.is_xml_processed(b'<Invoice/>')
+
+        other.mark_xml_processed(b'<Invoice/>', 'factura.xml')
+
+        assert repo.is_xml_processed(b'<Invoice/>')
+    finally:
+        other.close()
+
+
+def test_mark_xml_processed_many(repo):
+    repo.mark_xml_processed_many([
+        (b'<a/>', 'a.xml', 'lote.zip', 'F1', 'salida.xlsx'),
+        (b'<b/>', 'b.xml', 'lote.zip', 'F2', 'salida.xlsx'),
+    ])
+
+    assert repo.is_xml_processed(b'<a/>')
+    assert repo.is_xml_processed(b'<b/>')
+    assert not repo.is_xml_processed(b'<c/>')
+    assert repo.get_processing_stats()['xml_processed'] == 2
+
+
+def test_schema_is_recreated_after_the_file_is_deleted(tmp_path):
+    path = tmp_path / 'somex.db'
+    SomexRepository(str(path)).close()
+    for leftover in tmp_path.iterdir():
+        leftover.unlink()
+
+    repo = SomexRepository(str(path))
+    try:
+        repo.save_item({'codigo_item': 'A1', 'referencia': 'R1', 'descripcion': 'Item'})
+        assert repo.get_item_by_code('A1')['descripcion'] == 'Item'
+    finally:
+        repo.close()
+
+
+def test_schema_setup_is_skipped_when_up_to_date(repo, db_path, monkeypatch):
+    calls = []
+    monkeypatch.setattr(SomexRepository, '_create_schema', lambda self, cursor: calls.append(cursor))
+
+    SomexRepository(db_path).close()
+
+    assert calls == []
+
+
+def test_get_all_items_selected_columns(repo):
+    repo.save_items_bulk([
+        {'codigo_item': 'B2', 'referencia': 'R2', 'descripcion': 'Segundo', 'categoria': 'X'},
+        {'codigo_item': 'A1', 'referencia': 'R1', 'descripcion': 'Primero', 'categoria': 'Y'},
+    ])
+
+    items = repo.get_all_items(columns=('codigo_item', 'descripcion'))
+
+    assert items == [
+        {'codigo_item': 'A1', 'descripcion': 'Primero'},
+        {'codigo_item': 'B2', 'descripcion': 'Segundo'},
+    ]
+    with pytest.raises(ValueError):
+        repo.get_all_items(columns=('codigo_item', 'no_such_column'))
+
+
+def _epoch(dt):
+    return int(dt.timestamp()) * 1_000_000 + dt.microsecond
+
+
+def test_epoch_timestamps_read_back_as_iso_text(repo, monkeypatch):
+    written_at = datetime(2024, 3, 5, 14, 30, 15, 123456)
+    monkeypatch.setattr(somex_repository, '_now_epoch', lambda: _epoch(written_at))
+
+    repo.save_item({'codigo_item': 'A1', 'referencia': 'R1'})
+    repo.mark_xml_processed(b'<a/>', 'a.xml')
+
+    item = repo.get_item_by_code('A1')
+    assert item['created_at'] == item['updated_at'] == '2024-03-05 14:30:15.123456'
+    assert repo.get_all_items(columns=('created_at',)) == [
+        {'created_at': '2024-03-05 14:30:15.123456'}]
+    assert repo.get_processed_xml_list()[0]['processed_at'] == '2024-03-05 14:30:15.123456'
+
+
+def test_legacy_text_timestamps_are_returned_unchanged(repo, db_path):
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "INSERT INTO somex_items (codigo_item, referencia, created_at, updated_at) "
+            "VALUES ('OLD', 'R', '2023-01-02 03:04:05', '2023-01-02 03:04:05.600000')"
+        )
+    conn.close()
+
+    item = repo.get_item_by_code('OLD')
+
+    assert item['created_at'] == '2023-01-02 03:04:05'
+    assert item['updated_at'] == '2023-01-02 03:04:05.600000'
+
+
+def test_from_epoch_round_trips_microseconds():
+    moment = datetime(2024, 12, 31, 23, 59, 59, 999999)
+
+    assert somex_repository._from_epoch(_epoch(moment)) == moment
+
+
+def test_save_items_bulk_upserts_on_codigo_and_referencia(repo, monkeypatch):
+    clock = iter([100, 200])
+    monkeypatch.setattr(somex_repository, '_now_epoch', lambda: next(clock))
+
+    assert repo.save_items_bulk([
+        {'codigo_item': 'A1', 'referencia': 'R1', 'descripcion': 'Uno'},
+        {'codigo_item': 'A1', 'referencia': 'R2', 'descripcion': 'Uno bis'},
+        {'codigo_item': 'B2', 'referencia': 'R1', 'descripcion': 'Dos'},
+    ]) == 3
+    # Second import: A1/R1 changed, B2 unchanged, C3 new
+    repo.save_items_bulk([
+        {'codigo_item': 'A1', 'referencia': 'R1', 'descripcion': 'Uno nuevo'},
+        {'codigo_item': 'B2', 'referencia': 'R1', 'descripcion': 'Dos'},
+        {'codigo_item': 'C3', 'referencia': 'R1'},
+    ])
+
+    columns = ('codigo_item', 'referencia', 'descripcion', 'categoria')
+    assert repo.get_all_items(columns=columns) == [
+        {'codigo_item': 'A1', 'referencia': 'R1', 'descripcion': 'Uno nuevo', 'categoria': ''},
+        {'codigo_item': 'A1', 'referencia': 'R2', 'descripcion': 'Uno bis', 'categoria': ''},
+        {'codigo_item': 'B2', 'referencia': 'R1', 'descripcion': 'Dos', 'categoria': ''},
+        {'codigo_item': 'C3', 'referencia': 'R1', 'descripcion': '', 'categoria': ''},
+    ]
+
+    with sqlite3.connect(repo.db_path) as conn:
+        stamps = dict(((c, r), (created, updated)) for c, r, created, updated in conn.execute(
+            'SELECT codigo_item, referencia, created_at, updated_at FROM somex_items'))
+    conn.close()
+    assert stamps[('A1', 'R1')] == (100, 200)  # updated in place
+    assert stamps[('B2', 'R1')] == (100, 100)  # unchanged row is not rewritten
+    assert stamps[('C3', 'R1')] == (200, 200)
+
+
+def test_save_items_bulk_rolls_back_on_error(repo):
+    repo.save_items_bulk([{'codigo_item': 'A1', 'referencia': 'R1'}])
+
+    with pytest.raises(sqlite3.Error):
+        repo.save_items_bulk([
+            {'codigo_item': 'B2', 'referencia': 'R1'},
+            {'codigo_item': 'C3', 'referencia': 'R1', 'descripcion': object()},
+        ])
+
+    assert [item['codigo_item'] for item in repo.get_all_items(columns=('codigo_item',))] == ['A1']
@@ -0,0 +1,30 @@
+"""Tests for the shared SQLite connection setup"""
+import sqlite3
+
+import pytest
+
+from src.infrastructure.database.sqlite_connection import open_connection
+
+
+def test_pragmas_are_applied(tmp_path):
+    conn = open_connection(str(tmp_path / 'sub' / 'app.db'))
+    try:
+        assert conn.execute('PRAGMA synchronous').fetchone()[0] == 1  # NORMAL
+        assert conn.execute('PRAGMA busy_timeout').fetchone()[0] == 5000
+        assert conn.execute('PRAGMA cache_size').fetchone()[0] == -65536
+    finally:
+        conn.close()
+
+
+def test_read_only_connection_rejects_writes(tmp_path):
+    path = str(tmp_path / 'app.db')
+    writer = open_connection(path)
+    writer.execute('CREATE TABLE t (x)')
+
+    reader = open_connection(path, read_only=True)
+    try:
+        with pytest.raises(sqlite3.OperationalError):
+            reader.execute('INSERT INTO t VALUES (1)')
+    finally:
+        reader.close()
+        writer.close()
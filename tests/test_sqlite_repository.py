@@ -0,0 +1,125 @@
+"""Tests for SQLiteRepository"""
+import logging
+import sqlite3
+import threading
+from contextlib import ExitStack
+
+import pytest
+
+from src.infrastructure.database import sqlite_repository
+from src.infrastructure.database.sqlite_repository import SQLiteRepository
+
+
+@pytest.fixture
+def repo(tmp_path):
+    repository = SQLiteRepository(str(tmp_path / 'app.db'))
+    yield repository
+    repository.close()
+
+
+def _add_products(repo, count):
+    with repo.transaction():
+        for i in range(count):
+            repo.save_product(f'P{i}', f'Producto {i}', '1', 'KG')
+
+
+def test_iter_products_yields_every_page_newest_first(repo):
+    _add_products(repo, 1203)
+
+    ids = [product['id'] for product in repo.iter_products()]
+
+    assert ids == sorted(ids, reverse=True)
+    assert len(ids) == len(set(ids)) == 1203
+
+
+def test_iter_products_limit_and_offset_cross_pages(repo):
+    _add_products(repo, 1203)
+    all_ids = [product['id'] for product in repo.iter_products()]
+
+    page = [product['id'] for product in repo.get_all_products(limit=600, offset=450)]
+
+    assert page == all_ids[450:1050]
+
+
+def test_abandoned_iterators_do_not_hold_readers(repo):
+    _add_products(repo, 10)
+
+    # More partly consumed iterators than pooled readers
+    iterators = [repo.iter_products() for _ in range(sqlite_repository._MAX_READERS + 2)]
+    for iterator in iterators:
+        next(iterator)
+
+    pool = repo._pool
+    assert pool._idle.qsize() == len(pool._readers)
+    assert repo.get_products_count() == 10
+
+
+def test_full_pool_falls_back_to_writer(repo, monkeypatch):
+    monkeypatch.setattr(sqlite_repository, '_READER_WAIT_TIMEOUT', 0.05)
+    _add_products(repo, 3)
+    result = []
+
+    with ExitStack() as stack:
+        for _ in range(sqlite_repository._MAX_READERS):
+            stack.enter_context(repo._pool.reader())
+
+        # Another thread reads while every reader is checked out
+        reader = threading.Thread(target=lambda: result.append(repo.get_products_count()))
+        reader.start()
+        reader.join(timeout=5)
+
+        assert not reader.is_alive()
+
+    assert result == [3]
+
+
+def test_migration_sets_aside_duplicate_codigos(tmp_path, caplog):
+    path = str(tmp_path / 'old.db')
+    # Database created before codigo was unique, with an edited duplicate
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE pulgarin_products (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            codigo TEXT,
+            descripcion TEXT NOT NULL,
+            peso TEXT NOT NULL,
+            um TEXT NOT NULL,
+            created_at TIMESTAMP NOT NULL,
+            updated_at TIMESTAMP NOT NULL
+        )
+    ''')
+    conn.executemany(
+        'INSERT INTO pulgarin_products (codigo, descripcion, peso, um, created_at, updated_at) '
+        "VALUES (?, ?, ?, ?, '2024-01-01', '2024-01-01')",
+        [('P1', 'Arroz', '1', 'KG'), ('P1', 'Arroz editado', '2,5', 'KG'),
+         ('P2', 'Frijol', '1', 'KG'), (None, 'Sin codigo', '1', 'UN'),
+         (None, 'Sin codigo', '1', 'UN')]
+    )
+    conn.commit()
+    conn.close()
+
+    with caplog.at_level(logging.WARNING):
+        repo = SQLiteRepository(path)
+    try:
+        assert repo.get_product_by_code('P1')['descripcion'] == 'Arroz'
+        assert repo.get_products_count() == 4
+
+        with repo._pool.reader() as conn:
+            moved = conn.execute(
+                'SELECT id, codigo, descripcion, peso FROM pulgarin_products_duplicates'
+            ).fetchall()
+        assert [tuple(row) for row in moved] == [(2, 'P1', 'Arroz editado', '2,5')]
+        assert 'Arroz editado' in caplog.text
+
+        # The unique index is in place: saving P1 again updates it
+        repo.save_product('P1', 'Arroz nuevo', '3', 'KG')
+        assert repo.get_products_count() == 4
+    finally:
+        repo.close()
+
+
+def test_migration_without_duplicates_creates_no_backup(repo):
+    with repo._pool.reader() as conn:
+        tables = {row[0] for row in conn.execute("SELECT name FROM sqlite_master WHERE type = 'table'")}
+
+    assert 'pulgarin_products_duplicates' not in tables
@@ -0,0 +1,139 @@
+"""Tests for UBLXMLParser"""
+import threading
+from datetime import date
+from decimal import Decimal
+
+import pytest
+
+from src.infrastructure.xml import ubl_xml_parser
+from src.infrastructure.xml.ubl_xml_parser import UBLXMLParser
+
+NAMESPACES = (
+    'xmlns="urn:oasis:names:specification:ubl:schema:xsd:Invoice-2" '
+    'xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2" '
+    'xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2"'
+)
+
+INVOICE = f"""<?xml version="1.0" encoding="UTF-8"?>
+<Invoice {NAMESPACES}>
+  <cbc:ID>FE-1001</cbc:ID>
+  <cbc:IssueDate>2024-02-10</cbc:IssueDate>
+  <cbc:DueDate>2024-03-10</cbc:DueDate>
+  <cbc:Note>Pedido semanal</cbc:Note>
+  <cbc:DocumentCurrencyCode>{{currency}}</cbc:DocumentCurrencyCode>
+  <cac:AccountingSupplierParty>
+    <cac:Party>
+      <cac:PartyName><cbc:Name>Proveedor SAS</cbc:Name></cac:PartyName>
+      <cac:PartyTaxScheme><cbc:CompanyID>900123456</cbc:CompanyID></cac:PartyTaxScheme>
+    </cac:Party>
+  </cac:AccountingSupplierParty>
+  <cac:AccountingCustomerParty>
+    <cac:Party>
+      <cac:PartyTaxScheme><cbc:CompanyID>800987654</cbc:CompanyID></cac:PartyTaxScheme>
+      <cac:PartyLegalEntity><cbc:RegistrationName>Cliente Ltda</cbc:RegistrationName></cac:PartyLegalEntity>
+      <cac:PhysicalLocation><cac:Address><cbc:CityName>Medellín</cbc:CityName></cac:Address></cac:PhysicalLocation>
+    </cac:Party>
+  </cac:AccountingCustomerParty>
+  <cac:InvoiceLine>
+    <cbc:ID>1</cbc:ID>
+    <cbc:InvoicedQuantity unitCode="94">12.5</cbc:InvoicedQuantity>
+    <cac:TaxTotal><cac:TaxSubtotal><cac:TaxCategory><cbc:Percent>19.00</cbc:Percent></cac:TaxCategory></cac:TaxSubtotal></cac:TaxTotal>
+    <cac:Item>
+      <cbc:Description>Arroz Premium</cbc:Description>
+      <cac:SellersItemIdentification><cbc:ID>ARZ-01</cbc:ID></cac:SellersItemIdentification>
+    </cac:Item>
+    <cac:Price><cbc:PriceAmount>4200.50</cbc:PriceAmount></cac:Price>
+  </cac:InvoiceLine>
+  <cac:InvoiceLine>
+    <cbc:ID>2</cbc:ID>
+    <cbc:InvoicedQuantity unitCode="XYZ">3</cbc:InvoicedQuantity>
+    <cac:TaxTotal><cac:TaxSubtotal><cbc:Percent>5</cbc:Percent></cac:TaxSubtotal></cac:TaxTotal>
+    <cac:Item><cbc:Name>Panela</cbc:Name></cac:Item>
+    <cac:Price><cbc:PriceAmount>1000</cbc:PriceAmount></cac:Price>
+  </cac:InvoiceLine>
+</Invoice>"""
+
+
+def _invoice_xml(currency='COP'):
+    return INVOICE.format(currency=currency)
+
+
+def _attached_document(invoice_xml):
+    return f"""<?xml version="1.0" encoding="UTF-8"?>
+<AttachedDocument xmlns="urn:oasis:names:specification:ubl:schema:xsd:AttachedDocument-2"
+    xmlns:cac="urn:oasis:names:specification:ubl:schema:xsd:CommonAggregateComponents-2"
+    xmlns:cbc="urn:oasis:names:specification:ubl:schema:xsd:CommonBasicComponents-2">
+  <cbc:ID>AD-1</cbc:ID>
+  <cac:Attachment>
+    <cac:ExternalReference>
+      <cbc:Description><![CDATA[{invoice_xml}]]></cbc:Description>
+    </cac:ExternalReference>
+  </cac:Attachment>
+</AttachedDocument>""".encode('utf-8')
+
+
+def test_parse_invoice_reads_header_and_lines():
+    invoice = UBLXMLParser().parse_invoice(_invoice_xml().encode('utf-8'))
+
+    assert invoice.invoice_number == 'FE-1001'
+    assert invoice.invoice_date == date(2024, 2, 10)
+    assert invoice.payment_date == date(2024, 3, 10)
+    assert invoice.seller_nit == '900123456'
+    assert invoice.seller_name == 'Proveedor SAS'
+    assert invoice.buyer_nit == '800987654'
+    assert invoice.buyer_name == 'Cliente Ltda'
+    assert invoice.municipality == 'Medellín'
+    assert invoice.description == 'Pedido semanal'
+    assert invoice.currency == '1'
+
+    first, second = invoice.items
+    assert (first.product_name, first.product_code) == ('Arroz Premium', 'ARZ-01')
+    assert first.quantity == Decimal('12.5')
+    assert first.unit_of_measure == 'KG'
+    assert first.unit_price == Decimal('4200.50')
+    assert first.tax_percentage == Decimal('19.00')
+    assert (second.product_name, second.product_code) == ('Panela', '')
+    assert second.unit_of_measure == 'XYZ'
+    assert second.tax_percentage == Decimal('5')
+
+
+def test_parse_invoice_unwraps_attached_document():
+    wrapped = UBLXMLParser().parse_invoice(_attached_document(_invoice_xml()))
+
+    assert wrapped.invoice_number == 'FE-1001'
+    assert len(wrapped.items) == 2
+
+
+@pytest.mark.parametrize('code, expected', [('COP', '1'), ('USD', '2'), ('EUR', '3'), ('JPY', '1')])
+def test_parse_invoice_maps_currency(code, expected):
+    invoice = UBLXMLParser().parse_invoice(_invoice_xml(code).encode('utf-8'))
+
+    assert invoice.currency == expected
+
+
+def test_parse_invoice_rejects_malformed_xml():
+    with pytest.raises(RuntimeError):
+        UBLXMLParser().parse_invoice(b'<Invoice><unclosed></Invoice>')
+
+
+def test_deeply_nested_document_is_rejected():
+    depth = 300
+    xml = b'<a>' * depth + b'</a>' * depth
+
+    assert UBLXMLParser().validate_xml(xml) is False
+
+
+def test_oversized_text_node_is_rejected():
+    xml = b'<a>' + b'x' * (11 * 1024 * 1024) + b'</a>'
+
+    assert UBLXMLParser().validate_xml(xml) is False
+
+
+def test_parser_is_reused_per_thread():
+    parsers = []
+    worker = threading.Thread(target=lambda: parsers.append(ubl_xml_parser._get_parser()))
+    worker.start()
+    worker.join()
+
+    assert ubl_xml_parser._get_parser() is ubl_xml_parser._get_parser()
+    assert parsers[0] is not ubl_xml_parser._get_parser()